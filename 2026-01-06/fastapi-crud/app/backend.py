@@ -0,0 +1,95 @@
+from functools import lru_cache
+from types import ModuleType
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+
+from app import crud, crud_async
+from app.cache import get_stats_cache, get_user_cache
+from app.coalescer import build_write_coalescer
+from app.config import get_settings
+from app.models import sparse_user_helper_func
+
+
+class ThreadedCrud:
+    """Exposes the blocking pymongo CRUD module as awaitables run in the threadpool."""
+
+    def __init__(self, module: ModuleType):
+        self._module = module
+
+    def __getattr__(self, name):
+        func = getattr(self._module, name)
+
+        async def wrapper(*args, **kwargs):
+            return await run_in_threadpool(func, *args, **kwargs)
+
+        return wrapper
+
+
+# Built on first use, so importing this module does not read settings
+@lru_cache
+def get_crud_backend():
+    if get_settings().DB_MODE == "sync":
+        return ThreadedCrud(crud)
+    return crud_async
+
+
+@lru_cache
+def get_write_coalescer():
+    crud_backend = get_crud_backend()
+    return build_write_coalescer(crud_backend.insert_users_chunk, crud_backend.bump_collection_version)
+
+
+async def create_user(user_data: dict):
+    write_coalescer = get_write_coalescer()
+    if write_coalescer is not None:
+        return await write_coalescer.submit(user_data)
+    return await get_crud_backend().create_users(user_data)
+
+
+def stream_user_batches(batch_size: int, projection: dict = None):
+    """Async iterator over raw user document batches for either DB_MODE."""
+    if isinstance(get_crud_backend(), ThreadedCrud):
+        return iterate_in_threadpool(crud.iter_user_batches(batch_size, projection))
+    return crud_async.iter_user_batches(batch_size, projection)
+
+
+async def get_user_cached(user_id: str, fields: tuple = None):
+    """Read-through lookup of a single user; cached entries always hold the full document."""
+    crud_backend, user_cache = get_crud_backend(), get_user_cache()
+    if not user_cache.enabled:
+        return await crud_backend.get_user(user_id, fields)
+
+    user = await user_cache.get(user_id)
+    if user is None:
+        generation = user_cache.generation
+        user = await crud_backend.get_user(user_id)
+        if user is None:
+            return None
+        await user_cache.set(user_id, user, generation)
+    if fields is not None:
+        return sparse_user_helper_func({"_id": user["id"], **user}, fields)
+    return user
+
+
+async def get_user_stats_cached():
+    stats_cache = get_stats_cache()
+    stats = stats_cache.get("users")
+    if stats is None:
+        stats = await get_crud_backend().get_user_stats()
+        stats_cache.set("users", stats)
+    return stats
+
+
+async def users_changed(*user_ids: str, all_users: bool = False, bump_version: bool = False):
+    """Drop every cached view of the users collection touched by a write.
+
+    Filter-based writes cannot name the users they hit, so they pass all_users.
+    Chunk and bulk writes do not bump the collection version themselves; their
+    routes pass bump_version once per request, from a finally block.
+    """
+    if all_users:
+        await get_user_cache().clear()
+    else:
+        await get_user_cache().invalidate(*user_ids)
+    get_stats_cache().clear()
+    if bump_version:
+        await get_crud_backend().bump_collection_version()
@@ -0,0 +1,126 @@
+from bson import ObjectId
+from pymongo import DeleteMany, DeleteOne, UpdateMany, UpdateOne
+from app.models import with_search_fields
+from app.schema import UserBulkDelete, UserBulkUpdate
+
+BULK_WRITE_CHUNK_SIZE = 1000
+
+
+def _item(index: int, user_id: str = None, status: str = "ok", error: str = None,
+          matched: int = None, modified: int = None, deleted: int = None) -> dict:
+    return {
+        "index": index, "id": user_id, "status": status, "error": error,
+        "matched_count": matched, "modified_count": modified, "deleted_count": deleted
+    }
+
+
+def _counts(deleting: bool, found: int) -> dict:
+    if deleting:
+        return {"deleted": found}
+    # Every patch also increments version, so each matched user is modified
+    return {"matched": found, "modified": found}
+
+
+def plan_bulk_update(payload: UserBulkUpdate):
+    """Turn a bulk PATCH body into (operations, results for items rejected up front).
+
+    Each operation is (item index, user id or None, pymongo write model).
+    Id patches are numbered first, then filter patches.
+    """
+    operations, rejected = [], []
+    for index, item in enumerate(payload.updates):
+        patch = with_search_fields(item.patch.dict(exclude_unset=True))
+        if not ObjectId.is_valid(item.id):
+            rejected.append(_item(index, item.id, "error", "invalid id"))
+        elif not patch:
+            rejected.append(_item(index, item.id, "error", "empty patch"))
+        else:
+            operations.append((index, item.id, UpdateOne({"_id": ObjectId(item.id)}, {"$set": patch, "$inc": {"version": 1}})))
+
+    offset = len(payload.updates)
+    for index, item in enumerate(payload.filter_updates, start=offset):
+        patch = with_search_fields(item.patch.dict(exclude_unset=True))
+        if not patch:
+            rejected.append(_item(index, None, "error", "empty patch"))
+        else:
+            operations.append((index, None, UpdateMany(item.filter.to_query(), {"$set": patch, "$inc": {"version": 1}})))
+    return operations, rejected
+
+
+def plan_bulk_delete(payload: UserBulkDelete):
+    operations, rejected = [], []
+    for index, user_id in enumerate(payload.ids):
+        if not ObjectId.is_valid(user_id):
+            rejected.append(_item(index, user_id, "error", "invalid id"))
+        else:
+            operations.append((index, user_id, DeleteOne({"_id": ObjectId(user_id)})))
+
+    offset = len(payload.ids)
+    for index, user_filter in enumerate(payload.filters, start=offset):
+        operations.append((index, None, DeleteMany(user_filter.to_query())))
+    return operations, rejected
+
+
+async def run_bulk_write(operations: list, rejected: list, write_chunk, find_existing,
+                         chunk_size: int = BULK_WRITE_CHUNK_SIZE):
+    """Run planned operations as unordered bulk_writes and report counts per item.
+
+    `write_chunk` is an awaitable taking write models and returning a
+    bulk_api_result-style dict; `find_existing` takes ObjectIds and returns
+    the set of those that exist. Id-targeted operations go out in chunks.
+    When a chunk affected as many users as it targeted, every item is known
+    to have hit its user. Otherwise an id update is attributed with one _id
+    lookup after the write, while an id delete cannot be, so those items
+    report status "unknown" and null counts; the top-level counts stay exact.
+    Each filter operation runs as its own bulk_write and reports its counts.
+    """
+    report = {"matched_count": 0, "modified_count": 0, "deleted_count": 0, "results": list(rejected)}
+
+    async def write(models: list):
+        details = await write_chunk(models)
+        report["matched_count"] += details.get("nMatched", 0)
+        report["modified_count"] += details.get("nModified", 0)
+        report["deleted_count"] += details.get("nRemoved", 0)
+        failed = {err["index"]: err.get("errmsg", "write error") for err in details.get("writeErrors", [])}
+        return details, failed
+
+    by_id = [operation for operation in operations if operation[1]]
+    for start in range(0, len(by_id), chunk_size):
+        chunk = by_id[start:start + chunk_size]
+        deleting = isinstance(chunk[0][2], DeleteOne)
+        details, failed = await write([op for _, _, op in chunk])
+        written = [user_id for position, (_, user_id, _) in enumerate(chunk) if position not in failed]
+        affected = details.get("nRemoved" if deleting else "nMatched", 0)
+        if affected == len(written):
+            found = set(written)
+        elif deleting:
+            found = None
+        else:
+            found = {str(user_id) for user_id in await find_existing([ObjectId(user_id) for user_id in written])}
+
+        for position, (index, user_id, _) in enumerate(chunk):
+            if position in failed:
+                report["results"].append(_item(index, user_id, "error", failed[position]))
+            elif found is None:
+                report["results"].append(_item(index, user_id, "unknown"))
+            elif user_id in found:
+                report["results"].append(_item(index, user_id, **_counts(deleting, 1)))
+            else:
+                report["results"].append(_item(index, user_id, "not_found", **_counts(deleting, 0)))
+
+    for index, _, op in (operation for operation in operations if not operation[1]):
+        deleting = isinstance(op, DeleteMany)
+        details, failed = await write([op])
+        if failed:
+            report["results"].append(_item(index, None, "error", failed[0]))
+            continue
+        if deleting:
+            counts = {"deleted": details.get("nRemoved", 0)}
+        else:
+            counts = {"matched": details.get("nMatched", 0), "modified": details.get("nModified", 0)}
+        hit = counts.get("deleted", counts.get("matched"))
+        report["results"].append(_item(index, None, "ok" if hit else "not_found", **counts))
+
+    report["results"].sort(key=lambda item: item["index"])
+    report["error_count"] = sum(1 for item in report["results"] if item["status"] == "error")
+    return report
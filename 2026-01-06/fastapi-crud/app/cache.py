@@ -0,0 +1,202 @@
+import json
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from app.config import get_settings
+
+MISSING = object()
+
+
+class LRUTTLCache:
+    """In-process LRU cache whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        entry = self._data.get(key, MISSING)
+        if entry is MISSING:
+            self.misses += 1
+            return default
+        value, expires_at = entry
+        if expires_at <= self._clock():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        self._data[key] = (value, self._clock() + self.ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+
+class MemorySharedBackend:
+    """Local stand-in for a shared cache; same async interface as RedisSharedBackend."""
+
+    def __init__(self, ttl: float = 60.0):
+        self._cache = LRUTTLCache(maxsize=1_000_000, ttl=ttl)
+
+    async def get(self, key):
+        return self._cache.get(key)
+
+    async def set(self, key, value):
+        self._cache.set(key, value)
+
+    async def delete(self, *keys):
+        for key in keys:
+            self._cache.delete(key)
+
+    async def clear(self):
+        self._cache.clear()
+
+    async def close(self):
+        pass
+
+
+class RedisSharedBackend:
+    def __init__(self, url: str, ttl: float = 60.0, prefix: str = "users:"):
+        # redis is an optional dependency, only needed for USER_CACHE_SHARED=redis
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+        self._ttl = max(1, int(ttl))
+        self._prefix = prefix
+
+    async def get(self, key):
+        raw = await self._redis.get(self._prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key, value):
+        await self._redis.set(self._prefix + key, json.dumps(value), ex=self._ttl)
+
+    async def delete(self, *keys):
+        if keys:
+            await self._redis.delete(*(self._prefix + key for key in keys))
+
+    async def clear(self):
+        async for key in self._redis.scan_iter(match=self._prefix + "*"):
+            await self._redis.delete(key)
+
+    async def close(self):
+        await self._redis.aclose()
+
+
+class UserCache:
+    """Read-through cache for single users: in-process LRU first, then the optional shared tier."""
+
+    def __init__(self, local: LRUTTLCache, shared=None):
+        self.local = local
+        self.shared = shared
+        self.shared_hits = 0
+        self.shared_misses = 0
+        # Bumped on every invalidation so a fill racing with a write is dropped
+        self.generation = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.local.maxsize > 0 or self.shared is not None
+
+    async def get(self, user_id: str):
+        user = self.local.get(user_id)
+        if user is not None or self.shared is None:
+            return user
+        user = await self.shared.get(user_id)
+        if user is None:
+            self.shared_misses += 1
+            return None
+        self.shared_hits += 1
+        self.local.set(user_id, user)
+        return user
+
+    async def set(self, user_id: str, user: dict, generation: int = None):
+        if generation is not None and generation != self.generation:
+            return
+        self.local.set(user_id, user)
+        if self.shared is not None:
+            await self.shared.set(user_id, user)
+
+    async def invalidate(self, *user_ids: str):
+        self.generation += 1
+        for user_id in user_ids:
+            self.local.delete(user_id)
+        if self.shared is not None:
+            await self.shared.delete(*user_ids)
+
+    async def clear(self):
+        self.generation += 1
+        self.local.clear()
+        if self.shared is not None:
+            await self.shared.clear()
+
+    async def close(self):
+        if self.shared is not None:
+            await self.shared.close()
+
+    def stats(self) -> dict:
+        stats = {"local": self.local.stats(), "shared": None}
+        if self.shared is not None:
+            stats["shared"] = {
+                "backend": type(self.shared).__name__,
+                "hits": self.shared_hits,
+                "misses": self.shared_misses
+            }
+        return stats
+
+
+def build_user_cache() -> UserCache:
+    settings = get_settings()
+    local = LRUTTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+    shared = None
+    if settings.USER_CACHE_SHARED == "memory":
+        shared = MemorySharedBackend(ttl=settings.USER_CACHE_TTL)
+    elif settings.USER_CACHE_SHARED == "redis":
+        shared = RedisSharedBackend(settings.REDIS_URL, ttl=settings.USER_CACHE_TTL)
+    return UserCache(local, shared)
+
+
+# Built on first use, so importing this module does not read settings
+@lru_cache
+def get_user_cache() -> UserCache:
+    return build_user_cache()
+
+
+@lru_cache
+def get_stats_cache() -> LRUTTLCache:
+    return LRUTTLCache(maxsize=1, ttl=get_settings().STATS_CACHE_TTL)
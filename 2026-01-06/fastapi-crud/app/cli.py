@@ -0,0 +1,99 @@
+"""Offline bulk export/import of the users collection as Parquet or Arrow IPC.
+
+    python -m app.cli export users.parquet
+    python -m app.cli export users.arrow --format arrow --batch-size 50000
+    python -m app.cli import users.parquet --chunk-size 5000
+
+The format defaults to the file extension. Imports keep the exported ids, so
+an export can be restored into an empty database.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from app import crud
+from app.backend import ThreadedCrud
+from app.columnar import (
+    ARROW,
+    EXPORT_BATCH_SIZE,
+    EXPORT_PROJECTION,
+    MEDIA_TYPES,
+    PARQUET,
+    BatchWriter,
+    docs_to_batch,
+    iter_table_rows,
+    open_batches
+)
+from app.db import close_clients, connect_client, get_users_collection
+from app.indexes import ensure_indexes
+from app.ingest import BULK_CHUNK_SIZE, ingest_rows
+
+
+def guess_format(path: str, fmt: str = None) -> str:
+    if fmt:
+        return fmt
+    return ARROW if path.endswith((".arrow", ".arrows", ".ipc")) else PARQUET
+
+
+def export_users(path: str, fmt: str, batch_size: int) -> dict:
+    rows = 0
+    with open(path, "wb") as file:
+        writer = BatchWriter(fmt, file)
+        for docs in crud.iter_user_batches(batch_size, EXPORT_PROJECTION):
+            writer.write(docs_to_batch(docs))
+            rows += len(docs)
+        writer.close()
+    return {"exported_count": rows}
+
+
+def import_users(path: str, fmt: str, chunk_size: int) -> dict:
+    with open(path, "rb") as file:
+        batches = open_batches(file, fmt, chunk_size)
+        try:
+            return asyncio.run(ingest_rows(
+                iter_table_rows(batches),
+                ThreadedCrud(crud).insert_users_chunk,
+                chunk_size,
+                keep_ids=True,
+                report_ids=False
+            ))
+        finally:
+            crud.bump_collection_version()
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="write every user to a file")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--format", choices=sorted(MEDIA_TYPES))
+    export_parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+
+    import_parser = commands.add_parser("import", help="insert users from a file")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--format", choices=sorted(MEDIA_TYPES))
+    import_parser.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE)
+
+    args = parser.parse_args(argv)
+    fmt = guess_format(args.path, args.format)
+    connect_client()
+    try:
+        started = time.perf_counter()
+        if args.command == "export":
+            result = export_users(args.path, fmt, args.batch_size)
+        else:
+            ensure_indexes(get_users_collection())
+            result = import_users(args.path, fmt, args.chunk_size)
+        result["seconds"] = round(time.perf_counter() - started, 3)
+    finally:
+        close_clients()
+    json.dump(result, sys.stdout, indent=2)
+    print()
+    return 1 if result.get("failed_count") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
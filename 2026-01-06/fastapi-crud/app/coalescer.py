@@ -0,0 +1,138 @@
+import asyncio
+import time
+from pymongo.errors import DuplicateKeyError, WriteError
+from app.config import get_settings
+from app.models import user_helper_func
+
+DUPLICATE_KEY = 11000
+
+
+class WriteCoalescer:
+    """Collects concurrent single-user inserts and flushes them as one insert_many.
+
+    A batch is flushed when it reaches `max_batch` documents or `max_delay_ms`
+    after its first document arrived, whichever comes first. Every caller gets
+    its own inserted user back, or the exception for its own document.
+    `on_flush` runs once after every batch, also when the insert failed partway.
+    """
+
+    def __init__(self, insert_chunk, max_batch: int = 100, max_delay_ms: float = 5.0, on_flush=None):
+        self.insert_chunk = insert_chunk
+        self.on_flush = on_flush
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self._pending = []
+        self._timer = None
+        self._inflight = set()
+        self.batches = 0
+        self.documents = 0
+        self.failed_documents = 0
+        self.flushes_by_size = 0
+        self.flushes_by_timer = 0
+        self.max_batch_seen = 0
+        self.flush_seconds_total = 0.0
+        self.flush_seconds_max = 0.0
+
+    async def submit(self, user_data: dict) -> dict:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((user_data, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush_now(by_size=True)
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_after_delay())
+        return await future
+
+    async def _flush_after_delay(self):
+        await asyncio.sleep(self.max_delay)
+        self._timer = None
+        self._flush_now(by_size=False)
+
+    def _flush_now(self, by_size: bool):
+        if by_size and self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        if by_size:
+            self.flushes_by_size += 1
+        else:
+            self.flushes_by_timer += 1
+        task = asyncio.create_task(self._write(batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _write(self, batch: list):
+        docs = [user_data for user_data, _ in batch]
+        start = time.perf_counter()
+        try:
+            _, failed = await self.insert_chunk(docs)
+        except Exception as e:
+            failed = None
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        if self.on_flush is not None:
+            try:
+                await self.on_flush()
+            except Exception as e:
+                failed = None
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+        elapsed = time.perf_counter() - start
+
+        self.batches += 1
+        self.documents += len(batch)
+        self.max_batch_seen = max(self.max_batch_seen, len(batch))
+        self.flush_seconds_total += elapsed
+        self.flush_seconds_max = max(self.flush_seconds_max, elapsed)
+        if failed is None:
+            self.failed_documents += len(batch)
+            return
+
+        self.failed_documents += len(failed)
+        for index, (user_data, future) in enumerate(batch):
+            if future.done():
+                continue
+            error = failed.get(index)
+            if error is None:
+                future.set_result(user_helper_func(user_data))
+            elif error.get("code") == DUPLICATE_KEY:
+                future.set_exception(DuplicateKeyError(error.get("errmsg"), DUPLICATE_KEY, error))
+            else:
+                future.set_exception(WriteError(error.get("errmsg"), error.get("code"), error))
+
+    async def drain(self):
+        """Flush whatever is pending and wait for in-flight batches (used on shutdown)."""
+        self._flush_now(by_size=True)
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "max_batch": self.max_batch,
+            "max_delay_ms": self.max_delay * 1000,
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "documents": self.documents,
+            "failed_documents": self.failed_documents,
+            "flushes_by_size": self.flushes_by_size,
+            "flushes_by_timer": self.flushes_by_timer,
+            "mean_batch_size": round(self.documents / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_batch_seen,
+            "mean_flush_ms": round(self.flush_seconds_total / self.batches * 1000, 3) if self.batches else 0.0,
+            "max_flush_ms": round(self.flush_seconds_max * 1000, 3)
+        }
+
+
+def build_write_coalescer(insert_chunk, on_flush=None):
+    settings = get_settings()
+    if not settings.WRITE_COALESCING:
+        return None
+    return WriteCoalescer(
+        insert_chunk,
+        max_batch=settings.COALESCE_MAX_BATCH,
+        max_delay_ms=settings.COALESCE_MAX_DELAY_MS,
+        on_flush=on_flush
+    )
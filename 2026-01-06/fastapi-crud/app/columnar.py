@@ -0,0 +1,145 @@
+import tempfile
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from app.models import user_helper_func
+
+EXPORT_BATCH_SIZE = 10_000
+ARROW = "arrow"
+PARQUET = "parquet"
+FORMAT_PATTERN = f"^({ARROW}|{PARQUET})$"
+MEDIA_TYPES = {
+    ARROW: "application/vnd.apache.arrow.stream",
+    PARQUET: "application/vnd.apache.parquet",
+}
+EXPORT_PROJECTION = {"name": 1, "email": 1, "age": 1, "marks": 1, "version": 1}
+
+
+SPOOL_MAX_MEMORY = 16 * 1024 * 1024
+
+
+class ColumnarUnavailable(RuntimeError):
+    pass
+
+
+class InvalidColumnarFile(ValueError):
+    pass
+
+
+def _pyarrow():
+    # pyarrow is an optional dependency, only needed for export/import
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ColumnarUnavailable("Columnar export/import needs the pyarrow package")
+    return pa
+
+
+def user_schema():
+    pa = _pyarrow()
+    return pa.schema([
+        ("id", pa.string()),
+        ("name", pa.string()),
+        ("email", pa.string()),
+        ("age", pa.int32()),
+        ("marks", pa.float64()),
+        ("version", pa.int64()),
+    ])
+
+
+def docs_to_batch(docs: list):
+    pa = _pyarrow()
+    return pa.RecordBatch.from_pylist([user_helper_func(doc) for doc in docs], schema=user_schema())
+
+
+class _ChunkSink:
+    """Write-only file object whose contents are drained after every record batch."""
+
+    def __init__(self):
+        self._chunks = []
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class BatchWriter:
+    """Encodes record batches as an Arrow IPC stream or Parquet (one row group per batch)."""
+
+    def __init__(self, fmt: str, sink):
+        pa = _pyarrow()
+        schema = user_schema()
+        if fmt == ARROW:
+            self._writer = pa.ipc.new_stream(sink, schema)
+        else:
+            self._writer = pa.parquet.ParquetWriter(sink, schema)
+
+    def write(self, batch):
+        self._writer.write_batch(batch)
+
+    def close(self):
+        self._writer.close()
+
+
+async def export_stream(doc_batches, fmt: str):
+    """Yield encoded bytes as each Mongo batch is converted, so memory stays at one batch."""
+    sink = _ChunkSink()
+    writer = BatchWriter(fmt, sink)
+
+    def encode(docs):
+        writer.write(docs_to_batch(docs))
+        return sink.drain()
+
+    async for docs in doc_batches:
+        yield await run_in_threadpool(encode, docs)
+    writer.close()
+    yield sink.drain()
+
+
+def open_batches(file, fmt: str, batch_size: int = EXPORT_BATCH_SIZE):
+    pa = _pyarrow()
+    try:
+        if fmt == ARROW:
+            return pa.ipc.open_stream(file)
+        return pa.parquet.ParquetFile(file).iter_batches(batch_size=batch_size)
+    except (pa.ArrowInvalid, OSError) as e:
+        raise InvalidColumnarFile(f"Unreadable {fmt} file: {e}")
+
+
+def iter_file_rows(batches):
+    """Yield lists of (row number, row dict, None) per record batch."""
+    row_no = 0
+    for batch in batches:
+        rows = []
+        for row in batch.to_pylist():
+            row_no += 1
+            rows.append((row_no, row, None))
+        yield rows
+
+
+async def spool_upload(stream):
+    """Copy the request body to a temp file; Parquet needs a seekable footer read."""
+    file = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+    async for chunk in stream:
+        file.write(chunk)
+    file.seek(0)
+    return file
+
+
+async def iter_table_rows(batches):
+    """Async row iterator in the shape ingest_rows expects, decoding off the event loop."""
+    async for rows in iterate_in_threadpool(iter_file_rows(batches)):
+        for row in rows:
+            yield row
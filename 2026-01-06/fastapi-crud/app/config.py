@@ -0,0 +1,48 @@
+import os
+from functools import lru_cache
+from dotenv import load_dotenv
+
+
+def _optional_int(name: str):
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+class Settings:
+    def __init__(self):
+        self.MONGO_URI: str = os.getenv("MONGO_URI")
+        self.DB_NAME: str = os.getenv("DB_NAME", "users_db")
+        # "async" uses Motor on the event loop, "sync" runs pymongo in the threadpool
+        self.DB_MODE: str = os.getenv("DB_MODE", "async").lower()
+        # Connection pool and timeouts; unset values keep the driver defaults
+        self.MONGO_MAX_POOL_SIZE: int = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+        self.MONGO_MIN_POOL_SIZE: int = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+        self.MONGO_WAIT_QUEUE_TIMEOUT_MS: int = _optional_int("MONGO_WAIT_QUEUE_TIMEOUT_MS")
+        self.MONGO_SERVER_SELECTION_TIMEOUT_MS: int = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+        self.MONGO_CONNECT_TIMEOUT_MS: int = _optional_int("MONGO_CONNECT_TIMEOUT_MS")
+        self.MONGO_SOCKET_TIMEOUT_MS: int = _optional_int("MONGO_SOCKET_TIMEOUT_MS")
+        # Allows GET /users?explain=true to return the query plan summary
+        self.QUERY_DEBUG: bool = os.getenv("QUERY_DEBUG", "false").lower() in ("1", "true", "yes")
+        # Opt-in routes (by endpoint name) that skip response_model revalidation and encode with orjson
+        self.FAST_JSON_ROUTES: set = {
+            name.strip() for name in os.getenv("FAST_JSON_ROUTES", "").split(",") if name.strip()
+        }
+        # Opt-in micro-batching of POST /users into insert_many calls
+        self.WRITE_COALESCING: bool = os.getenv("WRITE_COALESCING", "false").lower() in ("1", "true", "yes")
+        self.COALESCE_MAX_BATCH: int = int(os.getenv("COALESCE_MAX_BATCH", "100"))
+        self.COALESCE_MAX_DELAY_MS: float = float(os.getenv("COALESCE_MAX_DELAY_MS", "5"))
+        # Single-user read-through cache; USER_CACHE_SIZE=0 disables the local tier
+        self.USER_CACHE_SIZE: int = int(os.getenv("USER_CACHE_SIZE", "10000"))
+        self.USER_CACHE_TTL: float = float(os.getenv("USER_CACHE_TTL", "60"))
+        # Optional shared tier: "" (off), "memory" (local stand-in) or "redis"
+        self.USER_CACHE_SHARED: str = os.getenv("USER_CACHE_SHARED", "").lower()
+        # /users/stats results are cached this long and dropped on any write
+        self.STATS_CACHE_TTL: float = float(os.getenv("STATS_CACHE_TTL", "30"))
+        self.REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+@lru_cache
+def get_settings() -> Settings:
+    # .env is read on first use rather than as an import side effect
+    load_dotenv()
+    return Settings()
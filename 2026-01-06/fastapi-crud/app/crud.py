@@ -1,36 +1,164 @@
 from bson import ObjectId
-from app.db import users_collection
-from app.models import user_helper_func
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+from app.db import get_users_collection
+from app.models import (
+    SEARCH_FIELDS,
+    user_helper_func,
+    sparse_user_helper_func,
+    user_projection,
+    new_user_document,
+    with_search_fields
+)
+from app.pagination import page_query, split_page
+from app.ingest import split_write_errors
+from app.indexes import summarize_explain
+from app.stats import STATS_PIPELINE, format_stats
+from app.etags import META_COLLECTION, USERS_VERSION_KEY
+from app.search import TEXT, prefix_filter, rank_prefix_hits, search_hit
+
+def _bump_collection_version(users_collection):
+    users_collection.database[META_COLLECTION].update_one(
+        {"_id": USERS_VERSION_KEY}, {"$inc": {"version": 1}}, upsert=True
+    )
+
+def bump_collection_version():
+    # Chunk and bulk writers leave this to their caller, which bumps once per request or batch
+    _bump_collection_version(get_users_collection())
+
+def get_collection_version():
+    users_collection = get_users_collection()
+    meta = users_collection.database[META_COLLECTION].find_one({"_id": USERS_VERSION_KEY})
+    return meta["version"] if meta else 0
 
 def create_users(user_data: dict):
-    user = users_collection.insert_one(user_data)
-    new_user = users_collection.find_one({"_id": user.inserted_id})
-    return user_helper_func(new_user)
-
-def get_users():
-    users = []
-    for user in users_collection.find():
-        users.append(user_helper_func(user))
-    return users
-
-def get_user(id: str):
-    user = users_collection.find_one({"_id": ObjectId(id)})
+    users_collection = get_users_collection()
+    new_user_document(user_data)
+    # insert_one stamps user_data with its _id, so the response is built locally
+    users_collection.insert_one(user_data)
+    _bump_collection_version(users_collection)
+    return user_helper_func(user_data)
+
+def _find_page(users_collection, limit: int, after: str, sort: str, fields: tuple, filters: dict):
+    query, sort_spec = page_query(sort, after, filters)
+    # The sort key stays in the projection so the next cursor can be built from it
+    projection = user_projection(fields, sort_spec[0][0])
+    return users_collection.find(query, projection).sort(sort_spec).limit(limit + 1)
+
+def get_users(limit: int, after: str = None, sort: str = "_id", fields: tuple = None, filters: dict = None):
+    users_collection = get_users_collection()
+    docs = list(_find_page(users_collection, limit, after, sort, fields, filters))
+    page, next_cursor = split_page(docs, limit, sort)
+    if fields is not None:
+        return [sparse_user_helper_func(user, fields) for user in page], next_cursor
+    return [user_helper_func(user) for user in page], next_cursor
+
+def explain_users(limit: int, after: str = None, sort: str = "_id", filters: dict = None):
+    users_collection = get_users_collection()
+    explain = _find_page(users_collection, limit, after, sort, None, filters).explain()
+    return summarize_explain(explain)
+
+def get_user(id: str, fields: tuple = None):
+    users_collection = get_users_collection()
+    user = users_collection.find_one({"_id": ObjectId(id)}, user_projection(fields))
+    if user and fields is not None:
+        return sparse_user_helper_func(user, fields)
     if user:
         return user_helper_func(user)
     return None
 
 def update_users(id: str, data: dict):
-    users_collection.update_one({"_id": ObjectId(id)}, {"$set": data})
-    user = users_collection.find_one({"_id": ObjectId(id)})
-    return user_helper_func(user)
+    users_collection = get_users_collection()
+    if not data:
+        return get_user(id)
+    user = users_collection.find_one_and_update(
+        {"_id": ObjectId(id)},
+        {"$set": with_search_fields(data), "$inc": {"version": 1}},
+        return_document=ReturnDocument.AFTER
+    )
+    if user:
+        _bump_collection_version(users_collection)
+        return user_helper_func(user)
+    return None
 
 def delete_users(id: str):
+    users_collection = get_users_collection()
     result = users_collection.delete_one({"_id": ObjectId(id)})
+    if result.deleted_count:
+        _bump_collection_version(users_collection)
     return result.deleted_count
 
 def insert_multiple_users(users: list):
-    result = users_collection.insert_many(users)
-    inserted_users = users_collection.find(
-        {"_id": {"$in": result.inserted_ids}}
-    )
-    return [user_helper_func(user) for user in inserted_users]
+    users_collection = get_users_collection()
+    for user in users:
+        new_user_document(user)
+    # insert_many stamps each document with its _id, so no read-back is needed
+    try:
+        users_collection.insert_many(users)
+    finally:
+        _bump_collection_version(users_collection)
+    return [user_helper_func(user) for user in users]
+
+def insert_users_chunk(users: list):
+    users_collection = get_users_collection()
+    for user in users:
+        new_user_document(user)
+    try:
+        users_collection.insert_many(users, ordered=False)
+        write_errors = []
+    except BulkWriteError as e:
+        write_errors = e.details.get("writeErrors", [])
+    succeeded, failed = split_write_errors(len(users), write_errors)
+    return [str(users[i]["_id"]) for i in succeeded], failed
+
+def iter_user_batches(batch_size: int, projection: dict = None):
+    """Yield raw user documents in _id order, batch_size at a time, from a single cursor."""
+    users_collection = get_users_collection()
+    cursor = users_collection.find({}, projection).sort("_id", 1).batch_size(batch_size)
+    batch = []
+    for user in cursor:
+        batch.append(user)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def search_users_prefix(q: str, limit: int):
+    users_collection = get_users_collection()
+    docs_by_field = {
+        field: list(users_collection.find(prefix_filter(field, q)).sort(field, 1).limit(limit))
+        for field in SEARCH_FIELDS.values()
+    }
+    return rank_prefix_hits(docs_by_field, q, limit)
+
+def search_users_text(q: str, limit: int):
+    users_collection = get_users_collection()
+    cursor = users_collection.find(
+        {"$text": {"$search": q}},
+        {"score": {"$meta": "textScore"}}
+    ).sort([("score", {"$meta": "textScore"})]).limit(limit)
+    return [search_hit(doc, doc["score"], TEXT) for doc in cursor]
+
+def get_user_stats():
+    users_collection = get_users_collection()
+    result = next(users_collection.aggregate(STATS_PIPELINE))
+    return format_stats(result)
+
+def bulk_write_users(operations: list):
+    users_collection = get_users_collection()
+    try:
+        result = users_collection.bulk_write(operations, ordered=False)
+        details = result.bulk_api_result
+    except BulkWriteError as e:
+        details = e.details
+    return details
+
+def find_user_ids(ids: list):
+    users_collection = get_users_collection()
+    # Covered _id lookup, used to tell which id-targeted bulk items were missing
+    return {doc["_id"] for doc in users_collection.find({"_id": {"$in": ids}}, {"_id": 1})}
+
+def ping():
+    users_collection = get_users_collection()
+    users_collection.database.client.admin.command("ping")
@@ -1,11 +1,61 @@
-import os
 from pymongo import MongoClient
-from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
 
-load_dotenv()
+from app.config import get_settings
+from app.pool_metrics import pool_metrics
 
-MONGO_URI = os.getenv("MONGO_URI")
+# Clients are opened and closed by the app lifespan (or by CLI entry points)
+client = None
+users_collection = None
+async_client = None
+async_users_collection = None
 
-client = MongoClient(MONGO_URI)
-db = client["users_db"]
-users_collection = db["users"]
+
+def client_options() -> dict:
+    settings = get_settings()
+    options = {
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+        "waitQueueTimeoutMS": settings.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": settings.MONGO_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": settings.MONGO_SOCKET_TIMEOUT_MS,
+    }
+    return {key: value for key, value in options.items() if value is not None}
+
+
+def connect_client():
+    global client, users_collection
+    settings = get_settings()
+    client = MongoClient(settings.MONGO_URI, event_listeners=[pool_metrics], **client_options())
+    users_collection = client[settings.DB_NAME]["users"]
+
+
+def connect_async_client():
+    global async_client, async_users_collection
+    settings = get_settings()
+    async_client = AsyncIOMotorClient(settings.MONGO_URI, event_listeners=[pool_metrics], **client_options())
+    async_users_collection = async_client[settings.DB_NAME]["users"]
+
+
+def close_clients():
+    global client, users_collection, async_client, async_users_collection
+    if client is not None:
+        client.close()
+    if async_client is not None:
+        async_client.close()
+    client = users_collection = None
+    async_client = async_users_collection = None
+    pool_metrics.reset()
+
+
+def get_users_collection():
+    if users_collection is None:
+        raise RuntimeError("Mongo client is not connected")
+    return users_collection
+
+
+def get_async_users_collection():
+    if async_users_collection is None:
+        raise RuntimeError("Async Mongo client is not connected")
+    return async_users_collection
@@ -0,0 +1,34 @@
+import hashlib
+from fastapi import Response
+
+# Collection-level version counter, bumped by every write path in crud.py
+META_COLLECTION = "meta"
+USERS_VERSION_KEY = "users"
+
+
+def _digest(value: str) -> str:
+    return hashlib.sha1(value.encode()).hexdigest()[:16]
+
+
+def user_etag(user_id: str, version: int, fields: tuple = None) -> str:
+    # A sparse representation is a different entity, so the field set is part of the tag
+    suffix = "-" + _digest(",".join(fields)) if fields is not None else ""
+    return f'"u-{user_id}-{version}{suffix}"'
+
+
+def list_etag(collection_version: int, query_string: str) -> str:
+    return f'"l-{collection_version}-{_digest(query_string)}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    # If-None-Match uses weak comparison (RFC 9110 13.1.2)
+    return etag.removeprefix("W/") in (tag.removeprefix("W/") for tag in candidates)
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
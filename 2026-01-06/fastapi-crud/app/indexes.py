@@ -0,0 +1,76 @@
+import logging
+from pymongo import ASCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Keyset pagination sorts on (field, _id), so every sortable field has an index
+# with exactly that prefix; otherwise each page runs a blocking in-memory SORT.
+# age_marks/marks_age serve range filters on both fields.
+USER_INDEXES = [
+    IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    IndexModel([("email", ASCENDING), ("_id", ASCENDING)], name="email"),
+    IndexModel([("age", ASCENDING), ("_id", ASCENDING)], name="age"),
+    IndexModel([("marks", ASCENDING), ("_id", ASCENDING)], name="marks"),
+    IndexModel([("name", ASCENDING), ("_id", ASCENDING)], name="name"),
+    IndexModel([("age", ASCENDING), ("marks", ASCENDING), ("_id", ASCENDING)], name="age_marks"),
+    IndexModel([("marks", ASCENDING), ("age", ASCENDING), ("_id", ASCENDING)], name="marks_age"),
+    # Search: anchored prefix scans on the lower-cased copies, full-word text search
+    IndexModel([("name_lower", ASCENDING)], name="name_lower"),
+    IndexModel([("email_lower", ASCENDING)], name="email_lower"),
+    IndexModel([("name", TEXT), ("email", TEXT)], name="name_email_text", weights={"name": 2, "email": 1}),
+]
+
+# Fills name_lower/email_lower on documents written before they existed
+SEARCH_BACKFILL = (
+    {"name_lower": None},
+    [{"$set": {"name_lower": {"$toLower": "$name"}, "email_lower": {"$toLower": "$email"}}}]
+)
+
+
+def _log_failure(error: OperationFailure):
+    # Most likely existing duplicate emails; keep serving and surface it in the logs
+    logger.warning("Could not create user indexes: %s", error)
+
+
+def ensure_indexes(collection) -> list:
+    collection.update_many(*SEARCH_BACKFILL)
+    try:
+        return collection.create_indexes(USER_INDEXES)
+    except OperationFailure as e:
+        _log_failure(e)
+        return []
+
+
+async def ensure_indexes_async(collection) -> list:
+    await collection.update_many(*SEARCH_BACKFILL)
+    try:
+        return await collection.create_indexes(USER_INDEXES)
+    except OperationFailure as e:
+        _log_failure(e)
+        return []
+
+
+def _plan_stages(plan: dict, stages: list, indexes: list):
+    stages.append(plan.get("stage"))
+    if plan.get("indexName"):
+        indexes.append(plan["indexName"])
+    for child in plan.get("inputStages", []) + [plan[key] for key in ("inputStage", "queryPlan") if key in plan]:
+        _plan_stages(child, stages, indexes)
+
+
+def summarize_explain(explain: dict) -> dict:
+    """Condense a find() explain document into the fields needed to spot collection scans."""
+    winning_plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+    stages, indexes = [], []
+    _plan_stages(winning_plan, stages, indexes)
+    stats = explain.get("executionStats", {})
+    return {
+        "stages": [stage for stage in stages if stage],
+        "indexes_used": indexes,
+        "collection_scan": "COLLSCAN" in stages,
+        "n_returned": stats.get("nReturned"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "docs_examined": stats.get("totalDocsExamined"),
+        "execution_time_ms": stats.get("executionTimeMillis")
+    }
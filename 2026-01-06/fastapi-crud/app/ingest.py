@@ -0,0 +1,188 @@
+import csv
+import json
+from collections import deque
+from typing import AsyncIterator
+from bson import ObjectId
+from pydantic import ValidationError
+from app.schema import UserCreate
+
+BULK_CHUNK_SIZE = 1000
+# Longest accepted line (or multi-line CSV record); longer input is reported and skipped
+MAX_LINE_BYTES = 1 << 20
+
+NDJSON = "ndjson"
+CSV = "csv"
+CONTENT_TYPES = {
+    "application/x-ndjson": NDJSON,
+    "application/ndjson": NDJSON,
+    "application/jsonl": NDJSON,
+    "text/csv": CSV,
+}
+
+
+def format_from_content_type(content_type: str):
+    return CONTENT_TYPES.get(content_type.split(";")[0].strip().lower())
+
+
+def split_write_errors(count: int, write_errors: list):
+    """Split an unordered insert_many chunk into succeeded indexes and {index: write error}."""
+    failed = {err["index"]: err for err in write_errors}
+    succeeded = [i for i in range(count) if i not in failed]
+    return succeeded, failed
+
+
+def _format_validation_error(error: ValidationError) -> list:
+    return [
+        f"{'.'.join(str(part) for part in err['loc']) or 'row'}: {err['msg']}"
+        for err in error.errors()
+    ]
+
+
+async def _iter_lines(stream: AsyncIterator[bytes]):
+    """Yield (line number, bytes) per line; a line over MAX_LINE_BYTES yields None instead of its bytes."""
+    line_no = 0
+    buffer = b""
+    overlong = False
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            yield line_no, None if overlong or len(line) > MAX_LINE_BYTES else line
+            overlong = False
+        if len(buffer) > MAX_LINE_BYTES:
+            # Drop the rest of the line as it arrives instead of buffering it
+            buffer = b""
+            overlong = True
+    if buffer or overlong:
+        yield line_no + 1, None if overlong or len(buffer) > MAX_LINE_BYTES else buffer
+
+
+class _LineFeed:
+    """Iterator the CSV reader pulls from; lines are pushed in once a record is complete."""
+
+    def __init__(self):
+        self.lines = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+async def iter_rows(stream: AsyncIterator[bytes], fmt: str):
+    """Yield (line, row dict or None, error messages) for each non-blank input record.
+
+    CSV goes through one incremental csv.reader, so quoted fields may span
+    lines; a record is handed to it once its quotes are balanced, and its
+    line number is the line it starts on.
+    """
+    header = None
+    feed = _LineFeed()
+    reader = csv.reader(feed)
+    record, record_line, record_bytes, quotes = [], None, 0, 0
+    async for line_no, raw in _iter_lines(stream):
+        if raw is None:
+            record, quotes, record_bytes = [], 0, 0
+            yield line_no, None, [f"row: longer than {MAX_LINE_BYTES} bytes"]
+            continue
+        try:
+            line = raw.decode("utf-8").rstrip("\r")
+        except UnicodeDecodeError:
+            record, quotes, record_bytes = [], 0, 0
+            yield line_no, None, ["row: not valid UTF-8"]
+            continue
+        if not record and not line.strip():
+            continue
+
+        if fmt == NDJSON:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, None, [f"row: invalid JSON ({e.msg})"]
+                continue
+            if not isinstance(row, dict):
+                yield line_no, None, ["row: expected a JSON object"]
+                continue
+            yield line_no, row, None
+            continue
+
+        if not record:
+            record_line = line_no
+        record.append(line + "\n")
+        record_bytes += len(raw)
+        quotes += line.count('"')
+        if quotes % 2:
+            # Inside a quoted field that continues on the next line
+            if record_bytes > MAX_LINE_BYTES:
+                record, quotes, record_bytes = [], 0, 0
+                yield record_line, None, [f"row: longer than {MAX_LINE_BYTES} bytes"]
+            continue
+        feed.lines.extend(record)
+        record, quotes, record_bytes = [], 0, 0
+        values = next(reader)
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield record_line, None, [f"row: expected {len(header)} columns, got {len(values)}"]
+            continue
+        # Empty CSV cells are treated as missing/null values
+        yield record_line, {name: (value if value != "" else None) for name, value in zip(header, values)}, None
+
+    if record:
+        yield record_line, None, ["row: unterminated quoted field"]
+
+
+async def ingest_users(stream: AsyncIterator[bytes], fmt: str, insert_chunk, chunk_size: int = BULK_CHUNK_SIZE):
+    return await ingest_rows(iter_rows(stream, fmt), insert_chunk, chunk_size)
+
+
+async def ingest_rows(rows, insert_chunk, chunk_size: int = BULK_CHUNK_SIZE, keep_ids: bool = False, report_ids: bool = True):
+    """Validate rows as they stream in and write them in bounded unordered chunks.
+
+    `rows` yields (line, row dict or None, error messages). `insert_chunk` is an
+    awaitable taking a list of documents and returning
+    (inserted ids, {chunk index: write error document}). With `keep_ids`, a
+    valid `id` column is kept as the document _id (restoring a backup).
+    """
+    report = {"inserted_count": 0, "failed_count": 0, "inserted_ids": [], "errors": []}
+    pending_lines, pending_docs = [], []
+
+    def fail(line_no, messages):
+        report["failed_count"] += 1
+        report["errors"].append({"line": line_no, "errors": messages})
+
+    async def flush():
+        inserted_ids, failed = await insert_chunk(pending_docs)
+        report["inserted_count"] += len(inserted_ids)
+        if report_ids:
+            report["inserted_ids"].extend(inserted_ids)
+        for index, error in sorted(failed.items()):
+            fail(pending_lines[index], [error.get("errmsg", "write error")])
+        pending_lines.clear()
+        pending_docs.clear()
+
+    async for line_no, row, errors in rows:
+        if errors:
+            fail(line_no, errors)
+            continue
+        try:
+            user = UserCreate(**row)
+        except ValidationError as e:
+            fail(line_no, _format_validation_error(e))
+            continue
+        doc = user.dict()
+        if keep_ids and ObjectId.is_valid(row.get("id") or ""):
+            doc["_id"] = ObjectId(row["id"])
+        pending_lines.append(line_no)
+        pending_docs.append(doc)
+        if len(pending_docs) >= chunk_size:
+            await flush()
+
+    if pending_docs:
+        await flush()
+    return report
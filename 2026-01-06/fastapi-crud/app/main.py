@@ -1,6 +1,56 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from starlette.concurrency import run_in_threadpool
+from app import db
+from app.config import get_settings
+from app.backend import get_write_coalescer
+from app.cache import get_user_cache
+from app.db import connect_client, connect_async_client, close_clients
+from app.indexes import ensure_indexes, ensure_indexes_async
 from app.routers.users import router as user_router
+from app.routers.health import router as health_router
 
-app = FastAPI(title="User Management API using FastAPI and MongoDB")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if get_settings().DB_MODE == "async":
+        connect_async_client()
+        await ensure_indexes_async(db.get_async_users_collection())
+    else:
+        connect_client()
+        await run_in_threadpool(ensure_indexes, db.get_users_collection())
+    yield
+    write_coalescer = get_write_coalescer()
+    if write_coalescer is not None:
+        await write_coalescer.drain()
+    await get_user_cache().close()
+    close_clients()
+
+
+app = FastAPI(
+    title="User Management API using FastAPI and MongoDB",
+    lifespan=lifespan
+)
 
 app.include_router(user_router)
+app.include_router(health_router)
+
+
+@app.exception_handler(DuplicateKeyError)
+async def duplicate_key_handler(request: Request, exc: DuplicateKeyError):
+    return JSONResponse(status_code=409, content={"detail": "A user with this email already exists"})
+
+
+@app.exception_handler(BulkWriteError)
+async def bulk_write_error_handler(request: Request, exc: BulkWriteError):
+    errors = exc.details.get("writeErrors", [])
+    return JSONResponse(
+        status_code=409,
+        content={
+            "detail": "Bulk insert stopped at the first rejected document",
+            "inserted_count": exc.details.get("nInserted", 0),
+            "errors": [{"index": err["index"], "error": err.get("errmsg")} for err in errors]
+        }
+    )
@@ -1,8 +1,45 @@
+USER_FIELDS = ("name", "email", "age", "marks")
+FIELDS_PATTERN = r"^(id|" + "|".join(USER_FIELDS) + r")(,(id|" + "|".join(USER_FIELDS) + r"))*$"
+# Case-normalized copies kept next to name/email for indexed prefix search
+SEARCH_FIELDS = {"name": "name_lower", "email": "email_lower"}
+
+def with_search_fields(data: dict) -> dict:
+    """Add the normalized search copies for any name/email in a document or $set patch."""
+    for field, normalized in SEARCH_FIELDS.items():
+        if data.get(field) is not None:
+            data[normalized] = data[field].lower()
+    return data
+
+def new_user_document(data: dict) -> dict:
+    # Every write $incs version; documents from before versioning read as 0
+    data["version"] = 1
+    return with_search_fields(data)
+
 def user_helper_func(user) -> dict:
     return {
         "id": str(user["_id"]),
         "name": user["name"],
         "email": user["email"],
         "age": user["age"],
-        "marks": user["marks"]
+        "marks": user["marks"],
+        "version": user.get("version", 0)
     }
+
+def parse_fields(fields: str):
+    """Turn a `fields=name,email` query value into a tuple in canonical order, or None for all fields."""
+    if not fields:
+        return None
+    requested = set(fields.split(","))
+    return tuple(field for field in USER_FIELDS if field in requested)
+
+def user_projection(fields, *extra):
+    if fields is None:
+        return None
+    return {field: 1 for field in (*fields, "version", *extra)}
+
+def sparse_user_helper_func(user, fields) -> dict:
+    # version rides along for ETags; the sparse response models drop it
+    data = {"id": str(user["_id"]), "version": user.get("version", 0)}
+    for field in fields:
+        data[field] = user.get(field)
+    return data
@@ -0,0 +1,82 @@
+import base64
+import binascii
+import json
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, DESCENDING
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+SORT_FIELDS = ("_id", "name", "email", "age", "marks")
+SORT_PATTERN = r"^-?(" + "|".join(SORT_FIELDS) + r")$"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def parse_sort(sort: str):
+    # "marks" sorts ascending, "-marks" descending; _id is always the tiebreaker
+    if sort.startswith("-"):
+        return sort[1:], DESCENDING
+    return sort, ASCENDING
+
+
+def encode_cursor(sort: str, user: dict) -> str:
+    field, _ = parse_sort(sort)
+    payload = {"s": sort, "id": str(user["_id"])}
+    if field != "_id":
+        payload["v"] = user.get(field)
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        last_id = ObjectId(payload["id"])
+    except (binascii.Error, ValueError, KeyError, TypeError, InvalidId):
+        raise InvalidCursor("Malformed pagination cursor")
+    if payload.get("s") != sort:
+        raise InvalidCursor("Cursor was issued for a different sort order")
+    return payload.get("v"), last_id
+
+
+def page_query(sort: str, after: str = None, base_filter: dict = None):
+    """Return the (filter, sort spec) that resume a keyset scan after `after`."""
+    query, sort_spec = _keyset_query(sort, after)
+    if base_filter and query:
+        return {"$and": [base_filter, query]}, sort_spec
+    return base_filter or query, sort_spec
+
+
+def _keyset_query(sort: str, after: str = None):
+    field, direction = parse_sort(sort)
+    sort_spec = [("_id", direction)] if field == "_id" else [(field, direction), ("_id", direction)]
+    if not after:
+        return {}, sort_spec
+
+    value, last_id = decode_cursor(after, sort)
+    beyond = "$gt" if direction == ASCENDING else "$lt"
+    if field == "_id":
+        return {"_id": {beyond: last_id}}, sort_spec
+
+    # Nulls sort before every other value, so they need their own branch
+    tie = {field: value, "_id": {beyond: last_id}}
+    if direction == ASCENDING:
+        if value is None:
+            return {"$or": [{field: {"$ne": None}}, tie]}, sort_spec
+        return {"$or": [{field: {"$gt": value}}, tie]}, sort_spec
+    if value is None:
+        return tie, sort_spec
+    return {"$or": [{field: {"$lt": value}}, tie, {field: None}]}, sort_spec
+
+
+def split_page(docs: list, limit: int, sort: str):
+    """Trim the look-ahead document fetched past `limit` and build the next cursor."""
+    if len(docs) <= limit:
+        return docs, None
+    page = docs[:limit]
+    return page, encode_cursor(sort, page[-1])
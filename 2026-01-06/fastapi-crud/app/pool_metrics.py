@@ -0,0 +1,92 @@
+import threading
+from pymongo import monitoring
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Counts connection pool events so waiting on the pool is visible apart from waiting on Mongo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.connections_open = 0
+            self.connections_created = 0
+            self.checked_out = 0
+            self.wait_queue = 0
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.checkout_wait_total = 0.0
+            self.checkout_wait_max = 0.0
+            self.pool_clears = 0
+
+    def _record_wait(self, event):
+        # `duration` (seconds spent waiting for the checkout) exists on pymongo >= 4.7
+        duration = getattr(event, "duration", None)
+        if duration is not None:
+            self.checkout_wait_total += duration
+            self.checkout_wait_max = max(self.checkout_wait_max, duration)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_open += 1
+            self.connections_created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_open -= 1
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self.wait_queue += 1
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.wait_queue -= 1
+            self.checkout_failures += 1
+            self._record_wait(event)
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.wait_queue -= 1
+            self.checked_out += 1
+            self.checkouts += 1
+            self._record_wait(event)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "connections_open": self.connections_open,
+                "connections_created": self.connections_created,
+                "checked_out": self.checked_out,
+                "wait_queue_depth": self.wait_queue,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "mean_checkout_wait_ms": round(self.checkout_wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "max_checkout_wait_ms": round(self.checkout_wait_max * 1000, 3),
+                "pool_clears": self.pool_clears
+            }
+
+
+pool_metrics = PoolMetrics()
@@ -0,0 +1,43 @@
+import time
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.backend import get_crud_backend, get_write_coalescer
+from app.config import get_settings
+from app.db import client_options
+from app.pool_metrics import pool_metrics
+from app.cache import get_stats_cache, get_user_cache
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+# DATABASE PING AND CONNECTION POOL
+@router.get("/db")
+async def db_health():
+    start = time.perf_counter()
+    try:
+        await get_crud_backend().ping()
+        error = None
+    except Exception as e:
+        error = str(e)
+    ping_ms = round((time.perf_counter() - start) * 1000, 3)
+    body = {
+        "status": "ok" if error is None else "unavailable",
+        "mode": get_settings().DB_MODE,
+        "ping_ms": ping_ms,
+        "error": error,
+        "pool": pool_metrics.snapshot(),
+        "pool_options": client_options()
+    }
+    return JSONResponse(body, status_code=200 if error is None else 503)
+
+# USER CACHE COUNTERS
+@router.get("/cache")
+async def cache_stats():
+    return {"users": get_user_cache().stats(), "stats": get_stats_cache().stats()}
+
+# WRITE COALESCER METRICS
+@router.get("/coalescer")
+async def coalescer_stats():
+    write_coalescer = get_write_coalescer()
+    if write_coalescer is None:
+        return {"enabled": False}
+    return {"enabled": True, **write_coalescer.stats()}
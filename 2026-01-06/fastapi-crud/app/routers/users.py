@@ -1,49 +1,288 @@
-from fastapi import APIRouter, HTTPException
-from app.schema import UserCreate, UserResponse, UserBulkCreate
-from app.crud import (
-    create_users,
-    get_users,
-    get_user,
-    update_users,
-    delete_users,
-    insert_multiple_users
+from typing import Optional
+from urllib.parse import urlencode
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from app.schema import (
+    UserCreate,
+    UserUpdate,
+    UserResponse,
+    UserBulkCreate,
+    UserBulkUpdate,
+    UserBulkDelete,
+    BulkWriteReport,
+    UserPage,
+    UserFilter,
+    BulkIngestReport,
+    UserStats,
+    UserSearchHit,
+    sparse_user_model,
+    sparse_user_page_model
 )
+from app.models import FIELDS_PATTERN, parse_fields
+from app.backend import (
+    create_user,
+    get_crud_backend,
+    get_user_cached,
+    get_user_stats_cached,
+    stream_user_batches,
+    users_changed
+)
+from app.config import get_settings
+from app.bulk import plan_bulk_delete, plan_bulk_update, run_bulk_write
+from app.ingest import BULK_CHUNK_SIZE, CSV, NDJSON, format_from_content_type, ingest_rows, ingest_users
+from app.columnar import (
+    EXPORT_BATCH_SIZE,
+    EXPORT_PROJECTION,
+    FORMAT_PATTERN,
+    MEDIA_TYPES,
+    PARQUET,
+    ColumnarUnavailable,
+    InvalidColumnarFile,
+    export_stream,
+    iter_table_rows,
+    open_batches,
+    spool_upload,
+    user_schema
+)
+from app.etags import etag_matches, list_etag, not_modified, user_etag
+from app.search import (
+    AUTO,
+    DEFAULT_SEARCH_LIMIT,
+    MAX_SEARCH_LIMIT,
+    PREFIX,
+    SEARCH_MODE_PATTERN,
+    TEXT,
+    merge_hits,
+    normalize_query
+)
+from app.serialization import FastJSONResponse, fast_path_enabled
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, SORT_PATTERN, InvalidCursor
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
+FIELDS_DESCRIPTION = "Comma-separated subset of fields to return, e.g. `name,email`; id is always included"
+
+
+def sparse_response(model, payload: dict) -> Response:
+    return Response(content=model(**payload).model_dump_json(), media_type="application/json")
+
+
+def with_etag(response: Response, etag: str) -> Response:
+    response.headers["ETag"] = etag
+    return response
+
 # CREATE
 @router.post("/", response_model=UserResponse)
-def add_user(user: UserCreate):
-    return create_users(user.dict())
+async def add_user(user: UserCreate):
+    created = await create_user(user.dict())
+    await users_changed()
+    return created
 
 # READ ALL
-@router.get("/", response_model=list[UserResponse])
-def list_users():
-    return get_users()
+@router.get("/", response_model=UserPage)
+async def list_users(
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    sort: str = Query("_id", pattern=SORT_PATTERN, description="Sort field, prefix with '-' for descending"),
+    fields: Optional[str] = Query(None, pattern=FIELDS_PATTERN, description=FIELDS_DESCRIPTION),
+    filters: UserFilter = Depends(),
+    explain: bool = Query(False, description="Return the query plan summary instead of results (needs QUERY_DEBUG)"),
+    if_none_match: Optional[str] = Header(None)
+):
+    selected = parse_fields(fields)
+    query = filters.to_query()
+    if explain:
+        if not get_settings().QUERY_DEBUG:
+            raise HTTPException(status_code=403, detail="Query explain is disabled")
+        try:
+            return JSONResponse(await get_crud_backend().explain_users(limit, after, sort, query))
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    # Read the version before the page so a concurrent write can only make the tag older
+    version = await get_crud_backend().get_collection_version()
+    etag = list_etag(version, urlencode(sorted(request.query_params.multi_items())))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    try:
+        users, next_cursor = await get_crud_backend().get_users(limit, after, sort, selected, query)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    page = {"items": users, "next_cursor": next_cursor}
+    if selected is not None:
+        return with_etag(sparse_response(sparse_user_page_model(selected), page), etag)
+    if fast_path_enabled("list_users"):
+        return with_etag(FastJSONResponse(page), etag)
+    response.headers["ETag"] = etag
+    return page
+
+# STATS (declared before /{user_id} so "stats" is not taken as an id)
+@router.get("/stats", response_model=UserStats)
+async def user_stats():
+    return await get_user_stats_cached()
+
+# SEARCH (prefix autocomplete on name/email, full-word text search)
+@router.get("/search", response_model=list[UserSearchHit])
+async def search_users(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(DEFAULT_SEARCH_LIMIT, ge=1, le=MAX_SEARCH_LIMIT),
+    mode: str = Query(AUTO, pattern=SEARCH_MODE_PATTERN)
+):
+    query = normalize_query(q)
+    if not query:
+        raise HTTPException(status_code=400, detail="Search query is empty")
+    if mode == TEXT:
+        return await get_crud_backend().search_users_text(query, limit)
+
+    hits = await get_crud_backend().search_users_prefix(query, limit)
+    if mode == PREFIX or len(hits) >= limit:
+        return hits
+    return merge_hits(hits, await get_crud_backend().search_users_text(query, limit), limit)
+
+# EXPORT (streamed Parquet / Arrow IPC, one record batch per Mongo batch)
+@router.get("/export", response_class=StreamingResponse)
+async def export_users(
+    format: str = Query(PARQUET, pattern=FORMAT_PATTERN),
+    batch_size: int = Query(EXPORT_BATCH_SIZE, ge=1, le=100000)
+):
+    try:
+        user_schema()
+    except ColumnarUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    batches = stream_user_batches(batch_size, EXPORT_PROJECTION)
+    return StreamingResponse(
+        export_stream(batches, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'}
+    )
+
+# IMPORT (Parquet / Arrow IPC upload, validated and written in unordered chunks)
+@router.post("/import", response_model=BulkIngestReport)
+async def import_users(
+    request: Request,
+    format: str = Query(PARQUET, pattern=FORMAT_PATTERN),
+    chunk_size: int = Query(BULK_CHUNK_SIZE, ge=1, le=10000)
+):
+    try:
+        user_schema()
+    except ColumnarUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    with await spool_upload(request.stream()) as file:
+        try:
+            batches = open_batches(file, format, chunk_size)
+        except InvalidColumnarFile as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        try:
+            return await ingest_rows(
+                iter_table_rows(batches),
+                get_crud_backend().insert_users_chunk,
+                chunk_size,
+                keep_ids=True,
+                report_ids=False
+            )
+        finally:
+            await users_changed(bump_version=True)
 
 # READ ONE
 @router.get("/{user_id}", response_model=UserResponse)
-def get_single_user(user_id: str):
-    user = get_user(user_id)
+async def get_single_user(
+    user_id: str,
+    response: Response,
+    fields: Optional[str] = Query(None, pattern=FIELDS_PATTERN, description=FIELDS_DESCRIPTION),
+    if_none_match: Optional[str] = Header(None)
+):
+    selected = parse_fields(fields)
+    # On a cache hit this needs no Mongo round trip, so a matching ETag costs nothing
+    user = await get_user_cached(user_id, selected)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    etag = user_etag(user["id"], user["version"], selected)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    if selected is not None:
+        return with_etag(sparse_response(sparse_user_model(selected), user), etag)
+    if fast_path_enabled("get_single_user"):
+        return with_etag(FastJSONResponse(user), etag)
+    response.headers["ETag"] = etag
     return user
 
+# BULK UPDATE (declared before /{user_id} so "bulk" is not taken as an id)
+@router.patch("/bulk", response_model=BulkWriteReport)
+async def update_multiple_users(data: UserBulkUpdate):
+    if any(not item.filter.to_query() for item in data.filter_updates):
+        raise HTTPException(status_code=400, detail="Every filter must constrain at least one field")
+    operations, rejected = plan_bulk_update(data)
+    crud_backend = get_crud_backend()
+    try:
+        return await run_bulk_write(operations, rejected, crud_backend.bulk_write_users, crud_backend.find_user_ids)
+    finally:
+        await users_changed(*(item.id for item in data.updates), all_users=bool(data.filter_updates), bump_version=True)
+
+# BULK DELETE
+@router.delete("/bulk", response_model=BulkWriteReport)
+async def remove_multiple_users(data: UserBulkDelete):
+    if any(not user_filter.to_query() for user_filter in data.filters):
+        raise HTTPException(status_code=400, detail="Every filter must constrain at least one field")
+    operations, rejected = plan_bulk_delete(data)
+    crud_backend = get_crud_backend()
+    try:
+        return await run_bulk_write(operations, rejected, crud_backend.bulk_write_users, crud_backend.find_user_ids)
+    finally:
+        await users_changed(*data.ids, all_users=bool(data.filters), bump_version=True)
+
 # UPDATE
 @router.put("/{user_id}", response_model=UserResponse)
-def update_single_user(user_id: str, user: UserCreate):
-    return update_users(user_id, user.dict())
+async def update_single_user(user_id: str, user: UserCreate):
+    updated = await get_crud_backend().update_users(user_id, user.dict())
+    await users_changed(user_id)
+    if not updated:
+        raise HTTPException(status_code=404, detail="User not found")
+    return updated
+
+# PARTIAL UPDATE
+@router.patch("/{user_id}", response_model=UserResponse)
+async def patch_single_user(user_id: str, user: UserUpdate):
+    updated = await get_crud_backend().update_users(user_id, user.dict(exclude_unset=True))
+    await users_changed(user_id)
+    if not updated:
+        raise HTTPException(status_code=404, detail="User not found")
+    return updated
 
 # DELETE
 @router.delete("/{user_id}")
-def remove_user(user_id: str):
-    deleted = delete_users(user_id)
+async def remove_user(user_id: str):
+    deleted = await get_crud_backend().delete_users(user_id)
+    await users_changed(user_id)
     if deleted == 0:
         raise HTTPException(status_code=404, detail="User not found")
     return {"message": "User deleted successfully"}
 
 # BULK INSERT
 @router.post("/bulk", response_model=list[UserResponse])
-def add_multiple_users(data: UserBulkCreate):
+async def add_multiple_users(data: UserBulkCreate):
     users = [user.dict() for user in data.users]
-    return insert_multiple_users(users)
+    try:
+        return await get_crud_backend().insert_multiple_users(users)
+    finally:
+        await users_changed()
+
+# BULK INGEST (streamed NDJSON / CSV upload)
+@router.post("/bulk/stream", response_model=BulkIngestReport)
+async def ingest_multiple_users(
+    request: Request,
+    format: Optional[str] = Query(None, pattern=f"^({NDJSON}|{CSV})$"),
+    chunk_size: int = Query(BULK_CHUNK_SIZE, ge=1, le=10000)
+):
+    fmt = format or format_from_content_type(request.headers.get("content-type", ""))
+    if fmt is None:
+        raise HTTPException(
+            status_code=415,
+            detail="Send application/x-ndjson or text/csv, or pass ?format=ndjson|csv"
+        )
+    try:
+        return await ingest_users(request.stream(), fmt, get_crud_backend().insert_users_chunk, chunk_size)
+    finally:
+        await users_changed(bump_version=True)
@@ -1,4 +1,5 @@
-from pydantic import BaseModel, Field
+from functools import lru_cache
+from pydantic import BaseModel, Field, create_model, field_validator
 from typing import Optional, List
 
 class UserBase(BaseModel):
@@ -10,8 +11,126 @@ class UserBase(BaseModel):
 class UserCreate(UserBase):
     pass
 
+class UserUpdate(BaseModel):
+    name: Optional[str] = None
+    email: Optional[str] = None
+    age: Optional[int] = Field(None, ge=0, le=120)
+    marks: Optional[float] = Field(None, ge=0, le=100)
+
+    # Omitted fields are left untouched; only marks may be explicitly cleared
+    @field_validator("name", "email", "age")
+    @classmethod
+    def not_null(cls, value):
+        if value is None:
+            raise ValueError("field cannot be null")
+        return value
+
+class UserFilter(BaseModel):
+    min_age: Optional[int] = Field(None, ge=0, le=120)
+    max_age: Optional[int] = Field(None, ge=0, le=120)
+    min_marks: Optional[float] = Field(None, ge=0, le=100)
+    max_marks: Optional[float] = Field(None, ge=0, le=100)
+
+    def to_query(self) -> dict:
+        query = {}
+        for field, op, value in (
+            ("age", "$gte", self.min_age),
+            ("age", "$lte", self.max_age),
+            ("marks", "$gte", self.min_marks),
+            ("marks", "$lte", self.max_marks),
+        ):
+            if value is not None:
+                query.setdefault(field, {})[op] = value
+        return query
+
 class UserResponse(UserBase):
     id: str
+    version: int = 0
+
+@lru_cache
+def sparse_user_model(fields: tuple):
+    # Response model holding only the requested fields, so validation cost follows the projection
+    return create_model(
+        "User_" + "_".join(fields),
+        id=(str, ...),
+        **{field: (UserBase.model_fields[field].annotation, UserBase.model_fields[field]) for field in fields}
+    )
+
+@lru_cache
+def sparse_user_page_model(fields: tuple):
+    return create_model(
+        "UserPage_" + "_".join(fields),
+        items=(List[sparse_user_model(fields)], ...),
+        next_cursor=(Optional[str], None)
+    )
 
 class UserBulkCreate(BaseModel):
-    users: List[UserCreate]
\ No newline at end of file
+    users: List[UserCreate]
+
+class UserIdPatch(BaseModel):
+    id: str
+    patch: UserUpdate
+
+class UserFilterPatch(BaseModel):
+    filter: UserFilter
+    patch: UserUpdate
+
+class UserBulkUpdate(BaseModel):
+    updates: List[UserIdPatch] = []
+    filter_updates: List[UserFilterPatch] = []
+
+class UserBulkDelete(BaseModel):
+    ids: List[str] = []
+    filters: List[UserFilter] = []
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[str]
+    # ok, not_found, error, or unknown (an id delete whose chunk missed some ids)
+    status: str
+    error: Optional[str]
+    # Per-item counts; null for errors and unknown items
+    matched_count: Optional[int] = None
+    modified_count: Optional[int] = None
+    deleted_count: Optional[int] = None
+
+class BulkWriteReport(BaseModel):
+    matched_count: int
+    modified_count: int
+    deleted_count: int
+    error_count: int
+    results: List[BulkItemResult]
+
+class UserSearchHit(UserResponse):
+    score: float
+    match: str
+
+class UserPage(BaseModel):
+    items: List[UserResponse]
+    next_cursor: Optional[str] = None
+
+class BulkRowError(BaseModel):
+    line: int
+    errors: List[str]
+
+class BulkIngestReport(BaseModel):
+    inserted_count: int
+    failed_count: int
+    inserted_ids: List[str]
+    errors: List[BulkRowError]
+
+class MarksBucket(BaseModel):
+    bucket: str
+    count: int
+
+class AgeBucket(MarksBucket):
+    mean_marks: Optional[float]
+
+class UserStats(BaseModel):
+    count: int
+    mean_marks: Optional[float]
+    min_marks: Optional[float]
+    max_marks: Optional[float]
+    mean_age: Optional[float]
+    marks_histogram: List[MarksBucket]
+    age_buckets: List[AgeBucket]
@@ -0,0 +1,49 @@
+import re
+from app.models import user_helper_func
+
+DEFAULT_SEARCH_LIMIT = 10
+MAX_SEARCH_LIMIT = 50
+
+PREFIX = "prefix"
+TEXT = "text"
+AUTO = "auto"
+SEARCH_MODE_PATTERN = f"^({AUTO}|{PREFIX}|{TEXT})$"
+
+
+def normalize_query(q: str) -> str:
+    return " ".join(q.split()).lower()
+
+
+def prefix_filter(field: str, q: str) -> dict:
+    # Anchored, case-sensitive regex on an already lower-cased field is an index range scan
+    return {field: {"$regex": "^" + re.escape(q)}}
+
+
+def search_hit(user: dict, score: float, match: str) -> dict:
+    return {**user_helper_func(user), "score": round(score, 4), "match": match}
+
+
+def rank_prefix_hits(docs_by_field: dict, q: str, limit: int) -> list:
+    """Merge name/email prefix matches: exact matches first, then the closest (shortest) values."""
+    best = {}
+    for field, docs in docs_by_field.items():
+        for doc in docs:
+            value = doc.get(field, "")
+            score = 2.0 if value == q else 1.0 + len(q) / max(len(value), 1)
+            key = str(doc["_id"])
+            if key not in best or score > best[key][0]:
+                best[key] = (score, value, doc)
+    ranked = sorted(best.values(), key=lambda hit: (-hit[0], hit[1]))
+    return [search_hit(doc, score, PREFIX) for score, _, doc in ranked[:limit]]
+
+
+def merge_hits(prefix_hits: list, text_hits: list, limit: int) -> list:
+    # Prefix (autocomplete) hits rank above full-word text hits
+    seen = {hit["id"] for hit in prefix_hits}
+    merged = list(prefix_hits)
+    for hit in text_hits:
+        if len(merged) >= limit:
+            break
+        if hit["id"] not in seen:
+            merged.append(hit)
+    return merged[:limit]
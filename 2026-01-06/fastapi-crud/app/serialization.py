@@ -0,0 +1,23 @@
+import json
+from fastapi import Response
+from app.config import get_settings
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+
+class FastJSONResponse(Response):
+    """JSON response for trusted DB output: no response_model revalidation, orjson encoding."""
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content)
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path_enabled(route_name: str) -> bool:
+    return route_name in get_settings().FAST_JSON_ROUTES
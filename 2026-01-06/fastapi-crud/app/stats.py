@@ -0,0 +1,65 @@
+MARKS_BOUNDARIES = [0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 101]
+AGE_BOUNDARIES = [0, 18, 25, 35, 50, 65, 121]
+UNKNOWN_BUCKET = "unknown"
+
+# One pass over the collection; $facet runs every breakdown over the same input
+STATS_PIPELINE = [
+    {"$project": {"_id": 0, "age": 1, "marks": 1}},
+    {"$facet": {
+        "summary": [{"$group": {
+            "_id": None,
+            "count": {"$sum": 1},
+            "mean_marks": {"$avg": "$marks"},
+            "min_marks": {"$min": "$marks"},
+            "max_marks": {"$max": "$marks"},
+            "mean_age": {"$avg": "$age"}
+        }}],
+        "marks_histogram": [{"$bucket": {
+            "groupBy": "$marks",
+            "boundaries": MARKS_BOUNDARIES,
+            "default": UNKNOWN_BUCKET,
+            "output": {"count": {"$sum": 1}}
+        }}],
+        "age_buckets": [{"$bucket": {
+            "groupBy": "$age",
+            "boundaries": AGE_BOUNDARIES,
+            "default": UNKNOWN_BUCKET,
+            "output": {"count": {"$sum": 1}, "mean_marks": {"$avg": "$marks"}}
+        }}]
+    }}
+]
+
+
+def _label(lower, boundaries, top):
+    # Buckets are [lower, upper); the last one also holds the top value
+    if lower == UNKNOWN_BUCKET:
+        return UNKNOWN_BUCKET
+    upper = boundaries[boundaries.index(lower) + 1]
+    return f"{lower}-{min(upper, top)}"
+
+
+def _round(value):
+    return round(value, 2) if value is not None else None
+
+
+def format_stats(result: dict) -> dict:
+    summary = result["summary"][0] if result["summary"] else {}
+    return {
+        "count": summary.get("count", 0),
+        "mean_marks": _round(summary.get("mean_marks")),
+        "min_marks": summary.get("min_marks"),
+        "max_marks": summary.get("max_marks"),
+        "mean_age": _round(summary.get("mean_age")),
+        "marks_histogram": [
+            {"bucket": _label(bucket["_id"], MARKS_BOUNDARIES, 100), "count": bucket["count"]}
+            for bucket in result["marks_histogram"]
+        ],
+        "age_buckets": [
+            {
+                "bucket": _label(bucket["_id"], AGE_BOUNDARIES, 120),
+                "count": bucket["count"],
+                "mean_marks": _round(bucket["mean_marks"])
+            }
+            for bucket in result["age_buckets"]
+        ]
+    }
@@ -0,0 +1,106 @@
+"""Search latency benchmark for GET /users/search at scale (default 1M users).
+
+Seeds synthetic users straight into a scratch database on MONGO_URI
+(--db-name, default users_bench; the application database is refused),
+creates the indexes, then times prefix and text queries through the CRUD
+layer and checks that none of them scan the collection.
+
+    python -m benchmarks.bench_search --users 1000000 --queries 2000
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+from app import crud, db
+from app.indexes import ensure_indexes, summarize_explain
+from app.models import with_search_fields
+from app.search import normalize_query, prefix_filter
+from benchmarks.load_test import percentile
+
+SYLLABLES = ["ka", "ri", "an", "sha", "mi", "ra", "vi", "de", "ta", "lo", "ne", "su", "ar", "jo", "el", "om"]
+SEED_CHUNK = 10_000
+BENCH_DB_NAME = "users_bench"
+APP_DB_NAME = "users_db"
+
+
+def synthetic_name(rng: random.Random) -> str:
+    first = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).title()
+    last = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).title()
+    return f"{first} {last}"
+
+
+def seed(collection, n: int, rng: random.Random) -> list:
+    existing = collection.estimated_document_count()
+    names = []
+    for start in range(existing, n, SEED_CHUNK):
+        chunk = []
+        for i in range(start, min(n, start + SEED_CHUNK)):
+            name = synthetic_name(rng)
+            names.append(name)
+            chunk.append(with_search_fields({
+                "name": name,
+                "email": f"{name.replace(' ', '.').lower()}.{i}@example.com",
+                "age": rng.randint(5, 90),
+                "marks": round(rng.uniform(0, 100), 1)
+            }))
+        collection.insert_many(chunk, ordered=False)
+    return names
+
+
+def timed(func, queries: list) -> dict:
+    latencies = []
+    for q in queries:
+        start = time.perf_counter()
+        func(q)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {
+        "queries": len(queries),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search latency benchmark")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--db-name", default=BENCH_DB_NAME, help="scratch database to seed (never the app database)")
+    args = parser.parse_args()
+    if args.db_name == APP_DB_NAME:
+        parser.error(f"refusing to seed synthetic users into the application database {APP_DB_NAME!r}")
+    # Settings are read on first use, so this decides the database db.connect_client opens
+    os.environ["DB_NAME"] = args.db_name
+
+    rng = random.Random(args.seed)
+    db.connect_client()
+    collection = db.get_users_collection()
+    try:
+        names = seed(collection, args.users, rng) or [synthetic_name(rng) for _ in range(1000)]
+        ensure_indexes(collection)
+
+        prefixes = [normalize_query(rng.choice(names)[:rng.randint(2, 6)]) for _ in range(args.queries)]
+        words = [normalize_query(rng.choice(names).split()[-1]) for _ in range(args.queries)]
+
+        plan = summarize_explain(
+            collection.find(prefix_filter("name_lower", prefixes[0])).limit(args.limit).explain()
+        )
+        report = {
+            "users": collection.estimated_document_count(),
+            "limit": args.limit,
+            "prefix": timed(lambda q: crud.search_users_prefix(q, args.limit), prefixes),
+            "text": timed(lambda q: crud.search_users_text(q, args.limit), words),
+            "prefix_plan": plan
+        }
+    finally:
+        db.close_clients()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
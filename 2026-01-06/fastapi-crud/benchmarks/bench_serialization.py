@@ -0,0 +1,82 @@
+"""Micro-benchmark: CPU cost of serializing a GET /users page.
+
+Compares FastAPI's default path (validate against response_model, serialize,
+encode with the stdlib) with FastJSONResponse (trusted dicts, orjson).
+
+    python -m benchmarks.bench_serialization --users 10000 --repeat 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from app.routers.users import router
+from app.serialization import FastJSONResponse, orjson
+
+
+def make_page(n: int) -> dict:
+    users = [
+        {
+            "id": str(ObjectId()),
+            "name": f"User {i}",
+            "email": f"user{i}@example.com",
+            "age": 18 + i % 60,
+            "marks": round((i * 7.3) % 100, 1),
+            "version": 1
+        }
+        for i in range(n)
+    ]
+    return {"items": users, "next_cursor": None}
+
+
+def cpu_time(func, repeat: int) -> float:
+    start = time.process_time()
+    for _ in range(repeat):
+        func()
+    return (time.process_time() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    page = make_page(args.users)
+    field = next(
+        route.response_field for route in router.routes
+        if isinstance(route, APIRoute) and route.name == "list_users"
+    )
+    loop = asyncio.new_event_loop()
+
+    def default_path():
+        content = loop.run_until_complete(serialize_response(field=field, response_content=page))
+        return JSONResponse(content).body
+
+    def fast_path():
+        return FastJSONResponse(page).body
+
+    assert json.loads(default_path()) == json.loads(fast_path())
+    default_s = cpu_time(default_path, args.repeat)
+    fast_s = cpu_time(fast_path, args.repeat)
+    per_10k = 10_000 / args.users
+
+    print(json.dumps({
+        "users": args.users,
+        "encoder": "orjson" if orjson is not None else "json",
+        "default_ms_per_10k": round(default_s * per_10k * 1000, 2),
+        "fast_ms_per_10k": round(fast_s * per_10k * 1000, 2),
+        "cpu_saved_ms_per_10k": round((default_s - fast_s) * per_10k * 1000, 2),
+        "speedup": round(default_s / fast_s, 1)
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""Load and latency benchmark for the users API.
+
+Seeds N synthetic users, then drives every route in app/routers/users.py with
+concurrent clients and reports throughput and p50/p95/p99 latency as JSON.
+
+    # in-process app against an in-memory Mongo stand-in
+    python -m benchmarks.load_test --mongo memory --users 5000 --output baseline.json
+
+    # in-process app against the mongod in MONGO_URI, async vs sync data layer
+    DB_MODE=async python -m benchmarks.load_test --output async.json
+    DB_MODE=sync  python -m benchmarks.load_test --output sync.json --baseline async.json
+
+    # an already running server
+    python -m benchmarks.load_test --base-url http://localhost:8000
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import httpx
+
+SEED_CHUNK = 1000
+BULK_SIZE = 100
+
+
+def synthetic_user(i: int, run_id: str) -> dict:
+    return {
+        "name": f"Bench User {i}",
+        "email": f"bench.{run_id}.{i}@example.com",
+        "age": random.randint(5, 90),
+        "marks": round(random.uniform(0, 100), 1)
+    }
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    # nearest-rank percentile
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: list, errors: int, wall_s: float) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall_s, 1) if wall_s else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2) if ordered else 0.0
+    }
+
+
+@asynccontextmanager
+async def open_client(base_url: str):
+    if base_url:
+        async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+            yield client
+        return
+
+    from app.main import app
+
+    # ASGITransport does not run the lifespan, so enter it here
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=30) as client:
+            yield client
+
+
+async def seed(client, n: int, run_id: str) -> list:
+    ids = []
+    for start in range(0, n, SEED_CHUNK):
+        users = [synthetic_user(i, run_id) for i in range(start, min(n, start + SEED_CHUNK))]
+        response = await client.post("/users/bulk", json={"users": users})
+        response.raise_for_status()
+        ids.extend(user["id"] for user in response.json())
+    return ids
+
+
+def build_scenarios(ids: list, run_id: str) -> dict:
+    counter = iter(range(10**9))
+
+    def get_single():
+        return "GET", f"/users/{random.choice(ids)}", None
+
+    def list_page():
+        sort = random.choice(["_id", "-marks", "age"])
+        return "GET", f"/users/?limit=50&sort={sort}", None
+
+    def create():
+        return "POST", "/users/", synthetic_user(next(counter), f"{run_id}-c")
+
+    def update():
+        return "PUT", f"/users/{random.choice(ids)}", synthetic_user(next(counter), f"{run_id}-u")
+
+    def patch():
+        return "PATCH", f"/users/{random.choice(ids)}", {"marks": round(random.uniform(0, 100), 1)}
+
+    def bulk():
+        users = [synthetic_user(next(counter), f"{run_id}-b") for _ in range(BULK_SIZE)]
+        return "POST", "/users/bulk", {"users": users}
+
+    return {
+        "get_single": get_single,
+        "list": list_page,
+        "create": create,
+        "update": update,
+        "patch": patch,
+        "bulk": bulk
+    }
+
+
+async def run_scenario(client, make_request, total: int, concurrency: int) -> dict:
+    latencies, errors = [], 0
+    remaining = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            method, url, body = make_request()
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, json=body)
+                ok = response.status_code < 300
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict) -> dict:
+    # relative change vs. the baseline run: negative latency / positive throughput is better
+    deltas = {}
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        deltas[name] = {
+            key: round((current[key] - previous[key]) / previous[key] * 100, 1) if previous[key] else None
+            for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+        }
+    return deltas
+
+
+async def main(args):
+    run_id = uuid4().hex[:8]
+    random.seed(args.seed)
+    async with open_client(args.base_url) as client:
+        ids = await seed(client, args.users, run_id)
+        scenarios = build_scenarios(ids, run_id)
+        selected = args.scenarios or list(scenarios)
+        results = {}
+        for name in selected:
+            total = max(1, args.requests // BULK_SIZE) if name == "bulk" else args.requests
+            results[name] = await run_scenario(client, scenarios[name], total, args.concurrency)
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "target": args.base_url or "in-process",
+        "mongo": args.mongo,
+        "db_mode": os.getenv("DB_MODE", "async"),
+        "params": {
+            "users": args.users,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed
+        },
+        "scenarios": results
+    }
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["change_vs_baseline_pct"] = compare(report, json.load(f))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load and latency benchmark for the users API")
+    parser.add_argument("--mongo", choices=["local", "memory"], default="local",
+                        help="local: mongod at MONGO_URI; memory: in-process mongomock stand-in")
+    parser.add_argument("--base-url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--users", type=int, default=1000, help="synthetic users to seed")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per scenario (bulk: /100)")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--scenarios", nargs="+",
+                        choices=["get_single", "list", "create", "update", "patch", "bulk"])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--baseline", help="earlier JSON report to diff against")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.mongo == "memory":
+        from benchmarks.memory_mongo import install
+        install()
+    asyncio.run(main(args))
@@ -0,0 +1,17 @@
+"""In-memory MongoDB stand-in for benchmarks (mongomock / mongomock-motor).
+
+install() must run before anything under app/ is imported, because app.db
+builds its clients from pymongo.MongoClient / AsyncIOMotorClient.
+"""
+import os
+
+
+def install():
+    import mongomock
+    import mongomock_motor
+    import motor.motor_asyncio
+    import pymongo
+
+    os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+    pymongo.MongoClient = mongomock.MongoClient
+    motor.motor_asyncio.AsyncIOMotorClient = mongomock_motor.AsyncMongoMockClient
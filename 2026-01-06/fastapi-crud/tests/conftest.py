@@ -4,4 +4,6 @@ from app.main import app
 
 @pytest.fixture(scope="module")
 def client():
-    return TestClient(app)
+    # Entering the client runs the app lifespan, which opens the Mongo client
+    with TestClient(app) as test_client:
+        yield test_client
@@ -0,0 +1,61 @@
+import pytest
+from uuid import uuid4
+from app.cache import LRUTTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUTTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = LRUTTLCache(maxsize=10, ttl=5, clock=clock)
+    cache.set("a", 1)
+
+    clock.now = 4.9
+    assert cache.get("a") == 1
+    clock.now = 5.0
+    assert cache.get("a") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["expirations"] == 1
+
+
+@pytest.fixture(scope="module")
+def cached_user(client):
+    response = client.post(
+        "/users",
+        json={"name": "Isha", "email": f"isha.{uuid4().hex[:8]}@gmail.com", "age": 24, "marks": 81}
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_cached_user_is_invalidated_by_update(client, cached_user):
+    user_id = cached_user["id"]
+    client.get(f"/users/{user_id}")
+    hits_before = client.get("/health/cache").json()["users"]["local"]["hits"]
+
+    assert client.get(f"/users/{user_id}").status_code == 200
+    assert client.get("/health/cache").json()["users"]["local"]["hits"] == hits_before + 1
+
+    client.patch(f"/users/{user_id}", json={"age": 40})
+    assert client.get(f"/users/{user_id}").json()["age"] == 40
@@ -0,0 +1,75 @@
+import asyncio
+from pymongo.errors import DuplicateKeyError
+from app.coalescer import WriteCoalescer
+
+
+def fake_insert_chunk(calls):
+    async def insert_chunk(docs):
+        calls.append(len(docs))
+        failed = {}
+        for index, doc in enumerate(docs):
+            if doc["email"] == "taken@gmail.com":
+                failed[index] = {"index": index, "code": 11000, "errmsg": "E11000 duplicate key"}
+            else:
+                doc["_id"] = f"id-{doc['name']}"
+        return [doc["_id"] for doc in docs if "_id" in doc], failed
+    return insert_chunk
+
+
+def user(name, email=None):
+    return {"name": name, "email": email or f"{name}@gmail.com", "age": 20, "marks": 80}
+
+
+def test_concurrent_inserts_share_one_batch():
+    calls = []
+    coalescer = WriteCoalescer(fake_insert_chunk(calls), max_batch=10, max_delay_ms=5)
+
+    async def run():
+        return await asyncio.gather(
+            *(coalescer.submit(user(f"u{i}")) for i in range(4)),
+            coalescer.submit(user("dup", "taken@gmail.com")),
+            return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+
+    assert calls == [5]
+    assert [result["id"] for result in results[:4]] == ["id-u0", "id-u1", "id-u2", "id-u3"]
+    assert isinstance(results[4], DuplicateKeyError)
+    assert coalescer.stats()["flushes_by_timer"] == 1
+    assert coalescer.stats()["failed_documents"] == 1
+
+
+def test_batch_flushes_when_full():
+    calls = []
+    coalescer = WriteCoalescer(fake_insert_chunk(calls), max_batch=2, max_delay_ms=1000)
+
+    async def run():
+        return await asyncio.gather(*(coalescer.submit(user(f"u{i}")) for i in range(4)))
+
+    asyncio.run(run())
+
+    assert calls == [2, 2]
+    assert coalescer.stats()["flushes_by_size"] == 2
+
+
+def test_on_flush_runs_once_per_batch_even_when_insert_fails():
+    calls, flushes = [], []
+
+    async def failing_insert_chunk(docs):
+        calls.append(len(docs))
+        raise RuntimeError("connection lost")
+
+    async def on_flush():
+        flushes.append(1)
+
+    coalescer = WriteCoalescer(failing_insert_chunk, max_batch=3, max_delay_ms=1000, on_flush=on_flush)
+
+    async def run():
+        return await asyncio.gather(*(coalescer.submit(user(f"u{i}")) for i in range(6)), return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert calls == [3, 3]
+    assert len(flushes) == 2
+    assert all(isinstance(result, RuntimeError) for result in results)
@@ -0,0 +1,29 @@
+def test_db_health_reports_ping_and_pool(client):
+    response = client.get("/health/db")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ok"
+    assert body["ping_ms"] >= 0
+    assert {"checked_out", "wait_queue_depth", "checkouts"} <= set(body["pool"])
+    assert body["pool_options"]["maxPoolSize"] > 0
+
+
+def test_coalescer_stats_endpoint(client):
+    response = client.get("/health/coalescer")
+
+    assert response.status_code == 200
+    assert "enabled" in response.json()
+
+
+def test_importing_the_app_does_not_read_settings():
+    import subprocess
+    import sys
+
+    # A fresh interpreter: settings, caches and the CRUD backend are all built on first use
+    code = (
+        "import app.main, app.routers.users\n"
+        "from app.config import get_settings\n"
+        "assert get_settings.cache_info().currsize == 0\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -1,4 +1,14 @@
+import json
 import pytest
+from uuid import uuid4
+
+from app.indexes import USER_INDEXES
+from app.pagination import SORT_FIELDS, page_query
+
+
+def unique_email(name):
+    # emails carry a unique index, so every run needs fresh addresses
+    return f"{name}.{uuid4().hex[:8]}@gmail.com"
 
 @pytest.fixture(scope="module")
 def created_user(client):
@@ -6,7 +16,7 @@ def created_user(client):
         "/users",
         json={
             "name": "Omkar",
-            "email": "omkar@gmail.com",
+            "email": unique_email("omkar"),
             "age": 21,
             "marks": 96.5
         }
@@ -22,8 +32,29 @@ def created_user(client):
 def test_get_all_users(client):
     response = client.get("/users")
     assert response.status_code == 200
-    assert isinstance(response.json(), list)
--
+    assert isinstance(response.json()["items"], list)
+
+
+def test_paginate_users(client, created_user):
+    first = client.get("/users", params={"limit": 1, "sort": "-marks"})
+    assert first.status_code == 200
+    page = first.json()
+    assert len(page["items"]) == 1
+
+    if page["next_cursor"]:
+        second = client.get(
+            "/users",
+            params={"limit": 1, "sort": "-marks", "after": page["next_cursor"]}
+        )
+        assert second.status_code == 200
+        assert second.json()["items"][0]["id"] != page["items"][0]["id"]
+
+
+def test_paginate_users_invalid_cursor(client):
+    response = client.get("/users", params={"after": "not-a-cursor"})
+    assert response.status_code == 400
+
+
 def test_get_single_user(client, created_user):
     user_id = created_user["id"]
     response = client.get(f"/users/{user_id}")
@@ -32,6 +63,22 @@ def test_get_single_user(client, created_user):
     assert response.json()["id"] == user_id
 
 
+def test_get_single_user_sparse_fields(client, created_user):
+    user_id = created_user["id"]
+    response = client.get(f"/users/{user_id}", params={"fields": "name"})
+
+    assert response.status_code == 200
+    assert response.json() == {"id": user_id, "name": created_user["name"]}
+
+
+def test_list_users_sparse_fields(client, created_user):
+    response = client.get("/users", params={"fields": "name,email", "sort": "age"})
+
+    assert response.status_code == 200
+    for user in response.json()["items"]:
+        assert set(user) == {"id", "name", "email"}
+
+
 def test_update_user(client, created_user):
     user_id = created_user["id"]
 
@@ -39,7 +86,7 @@ def test_update_user(client, created_user):
         f"/users/{user_id}",
         json={
             "name": "Omkar Updated",
-            "email": "omkar_updated@gmail.com",
+            "email": unique_email("omkar_updated"),
             "age": 22,
             "marks": 98
         }
@@ -49,6 +96,27 @@ def test_update_user(client, created_user):
     assert response.json()["name"] == "Omkar Updated"
 
 
+def test_patch_user(client, created_user):
+    user_id = created_user["id"]
+
+    response = client.patch(f"/users/{user_id}", json={"marks": 99.5})
+
+    assert response.status_code == 200
+    assert response.json()["marks"] == 99.5
+    assert response.json()["name"] == "Omkar Updated"
+
+
+def test_update_missing_user(client):
+    response = client.put(
+        "/users/000000000000000000000000",
+        json={"name": "Ghost", "email": unique_email("ghost"), "age": 30, "marks": 10}
+    )
+    assert response.status_code == 404
+
+    response = client.patch("/users/000000000000000000000000", json={"age": 31})
+    assert response.status_code == 404
+
+
 def test_delete_user(client, created_user):
     user_id = created_user["id"]
 
@@ -65,19 +133,19 @@ def test_bulk_insert_users(client):
             "users": [
                 {
                     "name": "Zain",
-                    "email": "zain@gmail.com",
+                    "email": unique_email("zain"),
                     "age": 21,
                     "marks": 95
                 },
                 {
                     "name": "Kushal",
-                    "email": "kushal@gmail.com",
+                    "email": unique_email("kushal"),
                     "age": 22,
                     "marks": 92
                 },
                 {
                     "name": "Ahan",
-                    "email": "ahan@gmail.com",
+                    "email": unique_email("ahan"),
                     "age": 23,
                     "marks": 90
                 }
@@ -87,3 +155,277 @@ def test_bulk_insert_users(client):
 
     assert response.status_code == 200
     assert len(response.json()) == 3
+
+
+def test_bulk_ingest_ndjson_reports_row_errors(client):
+    body = "\n".join([
+        json.dumps({"name": "Riya", "email": unique_email("riya"), "age": 20, "marks": 88}),
+        json.dumps({"name": "Bad Age", "email": unique_email("bad"), "age": 500, "marks": 50}),
+        "not json",
+        json.dumps({"name": "Dev", "email": unique_email("dev"), "age": 24, "marks": None})
+    ])
+    response = client.post(
+        "/users/bulk/stream",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+
+    assert response.status_code == 200
+    report = response.json()
+    assert report["inserted_count"] == 2
+    assert report["failed_count"] == 2
+    assert [error["line"] for error in report["errors"]] == [2, 3]
+
+
+def test_bulk_ingest_csv(client):
+    body = (
+        "name,email,age,marks\n"
+        f"Meera,{unique_email('meera')},21,91.5\n"
+        f"Arjun,{unique_email('arjun')},22,\n"
+    )
+    response = client.post(
+        "/users/bulk/stream",
+        params={"format": "csv", "chunk_size": 1},
+        content=body
+    )
+
+    assert response.status_code == 200
+    assert response.json()["inserted_count"] == 2
+    assert response.json()["errors"] == []
+
+
+def test_bulk_ingest_csv_multiline_and_overlong_rows(client, monkeypatch):
+    from app import ingest
+
+    monkeypatch.setattr(ingest, "MAX_LINE_BYTES", 200)
+    email = unique_email("kavya")
+    body = (
+        "name,email,age,marks\n"
+        f'"Kavya\nRao",{email},23,88\n'
+        f"{'x' * 300},{unique_email('long')},23,88\n"
+        f"Dev,{unique_email('dev')},24,70\n"
+    )
+    response = client.post("/users/bulk/stream", params={"format": "csv"}, content=body)
+
+    assert response.status_code == 200
+    report = response.json()
+    assert report["inserted_count"] == 2
+    assert [error["line"] for error in report["errors"]] == [4]
+    user = client.get(f"/users/{report['inserted_ids'][0]}").json()
+    assert user["name"] == "Kavya\nRao"
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_export_import_roundtrip(client, fmt):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    user = client.post("/users", json={"name": "Tara", "email": unique_email("tara"), "age": 27, "marks": 81}).json()
+
+    response = client.get("/users/export", params={"format": fmt, "batch_size": 2})
+    assert response.status_code == 200
+    source = pa.BufferReader(response.content)
+    table = pa.ipc.open_stream(source).read_all() if fmt == "arrow" else pa.parquet.read_table(source)
+    assert table.schema.field("age").type == pa.int32()
+    assert user["id"] in table.column("id").to_pylist()
+
+    # re-importing the export restores nothing new: every _id already exists
+    response = client.post("/users/import", params={"format": fmt}, content=response.content)
+    assert response.status_code == 200
+    assert response.json()["inserted_count"] == 0
+    assert response.json()["failed_count"] == table.num_rows
+
+    fresh = pa.table({
+        "name": ["Kabir", "No Age"],
+        "email": [unique_email("kabir"), unique_email("noage")],
+        "age": pa.array([33, None], pa.int32()),
+        "marks": [77.5, 40.0]
+    })
+    sink = pa.BufferOutputStream()
+    if fmt == "arrow":
+        with pa.ipc.new_stream(sink, fresh.schema) as writer:
+            writer.write_table(fresh)
+    else:
+        pa.parquet.write_table(fresh, sink)
+    response = client.post("/users/import", params={"format": fmt}, content=sink.getvalue().to_pybytes())
+    assert response.status_code == 200
+    assert response.json()["inserted_count"] == 1
+    assert [error["line"] for error in response.json()["errors"]] == [2]
+
+
+def test_import_rejects_unreadable_file(client):
+    pytest.importorskip("pyarrow")
+    response = client.post("/users/import", params={"format": "parquet"}, content=b"not parquet")
+    assert response.status_code == 400
+
+
+def test_duplicate_email_conflict(client):
+    user = {"name": "Twin", "email": unique_email("twin"), "age": 30, "marks": 70}
+    assert client.post("/users", json=user).status_code == 200
+
+    response = client.post("/users", json=user)
+    assert response.status_code == 409
+
+
+def test_filter_and_sort_users(client):
+    response = client.get(
+        "/users",
+        params={"min_age": 21, "max_age": 22, "max_marks": 95, "sort": "-marks"}
+    )
+
+    assert response.status_code == 200
+    users = response.json()["items"]
+    assert all(21 <= user["age"] <= 22 and user["marks"] <= 95 for user in users)
+    assert [user["marks"] for user in users] == sorted((user["marks"] for user in users), reverse=True)
+
+@pytest.mark.parametrize("sort", SORT_FIELDS)
+def test_every_sort_has_a_covering_index(sort):
+    # A (field, _id) sort is only read in index order if some index starts with exactly those keys
+    _, sort_spec = page_query(sort)
+    keys = [field for field, _ in sort_spec]
+    prefixes = [list(index.document["key"])[:len(keys)] for index in USER_INDEXES]
+    assert keys == ["_id"] or keys in prefixes
+
+
+def test_user_stats(client):
+    client.post(
+        "/users",
+        json={"name": "Stat", "email": unique_email("stat"), "age": 19, "marks": 100}
+    )
+    response = client.get("/users/stats")
+
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["count"] >= 1
+    assert stats["max_marks"] == 100
+    assert sum(bucket["count"] for bucket in stats["marks_histogram"]) == stats["count"]
+    assert sum(bucket["count"] for bucket in stats["age_buckets"]) == stats["count"]
+
+
+def test_bulk_update_and_delete_users(client):
+    created = client.post(
+        "/users/bulk",
+        json={"users": [
+            {"name": "Grade A", "email": unique_email("grade_a"), "age": 117, "marks": 40},
+            {"name": "Grade B", "email": unique_email("grade_b"), "age": 117, "marks": 45}
+        ]}
+    ).json()
+    ids = [user["id"] for user in created]
+    missing_id = "000000000000000000000000"
+
+    response = client.patch(
+        "/users/bulk",
+        json={
+            "updates": [
+                {"id": ids[0], "patch": {"marks": 41}},
+                {"id": missing_id, "patch": {"marks": 50}},
+                {"id": "not-an-id", "patch": {"marks": 50}}
+            ],
+            "filter_updates": [
+                {"filter": {"min_age": 117, "max_age": 117}, "patch": {"age": 118}},
+                {"filter": {"min_age": 0, "max_age": 0, "min_marks": 100}, "patch": {"marks": 99}}
+            ]
+        }
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert [item["status"] for item in report["results"]] == ["ok", "not_found", "error", "ok", "not_found"]
+    assert [item["matched_count"] for item in report["results"]] == [1, 0, None, 2, 0]
+    assert report["matched_count"] == 3
+    assert client.get(f"/users/{ids[0]}").json()["marks"] == 41
+    assert client.get(f"/users/{ids[1]}").json()["age"] == 118
+
+    response = client.request("DELETE", "/users/bulk", json={"ids": ids})
+    assert response.status_code == 200
+    assert response.json()["deleted_count"] == 2
+    assert [item["deleted_count"] for item in response.json()["results"]] == [1, 1]
+    assert client.get(f"/users/{ids[0]}").status_code == 404
+
+    # a chunk that missed some ids cannot say which ones after deleting
+    response = client.request("DELETE", "/users/bulk", json={"ids": [ids[0], missing_id]})
+    assert [item["status"] for item in response.json()["results"]] == ["unknown", "unknown"]
+
+
+def test_bulk_delete_rejects_unbounded_filter(client):
+    response = client.request("DELETE", "/users/bulk", json={"filters": [{}]})
+    assert response.status_code == 400
+
+
+def test_search_users_by_prefix(client):
+    email = unique_email("searchable")
+    client.post("/users", json={"name": "Searchable Person", "email": email, "age": 33, "marks": 60})
+
+    by_name = client.get("/users/search", params={"q": "SEARCHABLE pe", "mode": "prefix"})
+    assert by_name.status_code == 200
+    assert any(hit["email"] == email for hit in by_name.json())
+    assert all(hit["match"] == "prefix" for hit in by_name.json())
+
+    by_email = client.get("/users/search", params={"q": email[:15], "mode": "prefix", "limit": 1})
+    assert by_email.json()[0]["email"].startswith(email[:15])
+
+
+def test_conditional_get_single_user(client):
+    user = client.post(
+        "/users",
+        json={"name": "Etag", "email": unique_email("etag"), "age": 27, "marks": 77}
+    ).json()
+    first = client.get(f"/users/{user['id']}")
+    etag = first.headers["ETag"]
+
+    cached = client.get(f"/users/{user['id']}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+
+    client.patch(f"/users/{user['id']}", json={"marks": 78})
+    changed = client.get(f"/users/{user['id']}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.json()["version"] == user["version"] + 1
+
+
+def test_conditional_get_user_list(client):
+    params = {"limit": 5, "sort": "age"}
+    etag = client.get("/users", params=params).headers["ETag"]
+
+    assert client.get("/users", params=params, headers={"If-None-Match": etag}).status_code == 304
+
+    client.post("/users", json={"name": "Poll", "email": unique_email("poll"), "age": 5, "marks": 50})
+    assert client.get("/users", params=params, headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_failed_bulk_ingest_still_bumps_list_etag(client, monkeypatch):
+    from app import crud, crud_async
+    from app.backend import ThreadedCrud, get_crud_backend
+
+    module = crud if isinstance(get_crud_backend(), ThreadedCrud) else crud_async
+    calls = []
+
+    def recorded(name, func):
+        def wrapper(*args):
+            calls.append(name)
+            if name == "chunk" and calls.count("chunk") > 1:
+                raise RuntimeError("connection lost")
+            return func(*args)
+        return wrapper
+
+    monkeypatch.setattr(module, "insert_users_chunk", recorded("chunk", module.insert_users_chunk))
+    monkeypatch.setattr(module, "bump_collection_version", recorded("bump", module.bump_collection_version))
+    params = {"limit": 5, "sort": "age"}
+    etag = client.get("/users", params=params).headers["ETag"]
+
+    body = "\n".join(
+        json.dumps({"name": f"Lost{i}", "email": unique_email(f"lost{i}"), "age": 30, "marks": 60})
+        for i in range(2)
+    )
+    with pytest.raises(RuntimeError):
+        client.post(
+            "/users/bulk/stream",
+            params={"chunk_size": 1},
+            content=body,
+            headers={"content-type": "application/x-ndjson"}
+        )
+
+    # The first chunk was written before the failure, so the list tag must move, once per request
+    assert calls.count("bump") == 1
+    assert client.get("/users", params=params, headers={"If-None-Match": etag}).status_code == 200
@@ -1,29 +1,77 @@
-from fastapi import APIRouter
-from app.models.schemas import DocumentCreate, QueryRequest
+from fastapi import APIRouter, HTTPException
+from app.models.schemas import BatchQueryRequest, DocumentCreate, QueryRequest
+from app.services.embedding_cache import embedding_cache
+from app.services.ollama_client import ollama_client
+from app.services.query_cache import query_result_cache
 from app.services.vector_service import (
-    add_document,
+    ingestion_queue,
     query_documents,
-    update_document,
+    query_documents_batch,
+    search_backend,
     delete_document,
     get_all_documents
 )
 
 router = APIRouter()
 
-@router.post("/vectors")
+@router.post("/vectors", status_code=202)
 def create_vector(doc: DocumentCreate):
-    add_document(doc.id, doc.text)
-    return {"message": "Document added successfully"}
+    job = ingestion_queue.submit(doc.id, doc.text)
+    return {"message": "Document queued for ingestion", **job}
+
+@router.get("/vectors/jobs")
+def ingestion_stats():
+    return ingestion_queue.stats()
+
+@router.get("/vectors/jobs/{job_id}")
+def get_ingestion_job(job_id: str):
+    job = ingestion_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 @router.post("/vectors/query")
 def read_vectors(request: QueryRequest):
-    results = query_documents(request.query)
+    try:
+        results = query_documents(
+            request.query,
+            n_results=request.n_results,
+            max_distance=request.max_distance,
+            filters=request.filters
+        )
+    except ValueError as e:
+        # Chroma rejects malformed where filters with ValueError
+        raise HTTPException(status_code=400, detail=str(e))
     return results
 
-@router.put("/vectors/{doc_id}")
+@router.post("/vectors/query/batch")
+def read_vectors_batch(request: BatchQueryRequest):
+    try:
+        results = query_documents_batch([q.model_dump() for q in request.queries])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"results": results}
+
+@router.get("/vectors/index/stats")
+def search_index_stats():
+    return search_backend.stats()
+
+@router.post("/vectors/index/reload")
+def reload_search_index():
+    # For writers that did not bump the collection generation (e.g. a direct Chroma client)
+    search_backend.reload()
+    return search_backend.stats()
+
+@router.get("/vectors/query/cache/stats")
+def query_cache_stats():
+    if query_result_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **query_result_cache.stats()}
+
+@router.put("/vectors/{doc_id}", status_code=202)
 def update_vector(doc_id: str, doc: DocumentCreate):
-    update_document(doc_id, doc.text)
-    return {"message": "Document updated"}
+    job = ingestion_queue.submit(doc_id, doc.text)
+    return {"message": "Document update queued", **job}
 
 @router.delete("/vectors/{doc_id}")
 def delete_vector(doc_id: str):
@@ -34,3 +82,12 @@ def delete_vector(doc_id: str):
 def list_vectors(limit: int = 10):
     return get_all_documents(limit)
 
+@router.get("/embeddings/stats")
+def embedding_client_stats():
+    return ollama_client.snapshot()
+
+@router.get("/embeddings/cache/stats")
+def embedding_cache_stats():
+    if embedding_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **embedding_cache.stats()}
@@ -6,9 +6,50 @@ load_dotenv()
 class Settings:
     OLLAMA_BASE_URL: str = os.getenv("OLLAMA_BASE_URL")
     EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL")
+    # Inputs sent per /api/embed request
+    EMBED_BATCH_SIZE: int = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+    # Shared Ollama HTTP client: pool size / in-flight limit, timeouts in seconds
+    OLLAMA_MAX_CONCURRENCY: int = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4"))
+    OLLAMA_CONNECT_TIMEOUT: float = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5"))
+    OLLAMA_READ_TIMEOUT: float = float(os.getenv("OLLAMA_READ_TIMEOUT", "60"))
+    # Retries with full-jitter backoff, capped to a fraction of traffic by the retry budget
+    OLLAMA_MAX_RETRIES: int = int(os.getenv("OLLAMA_MAX_RETRIES", "3"))
+    OLLAMA_RETRY_BACKOFF: float = float(os.getenv("OLLAMA_RETRY_BACKOFF", "0.25"))
+    OLLAMA_RETRY_BUDGET_RATIO: float = float(os.getenv("OLLAMA_RETRY_BUDGET_RATIO", "0.2"))
+    OLLAMA_RETRY_BUDGET_MIN: int = int(os.getenv("OLLAMA_RETRY_BUDGET_MIN", "10"))
     CHROMA_PERSIST_DIR: str = os.path.abspath(
         os.getenv("CHROMA_PERSIST_DIR")
     )
+    # Embedding cache: in-memory LRU entries, SQLite store next to the Chroma directory
+    EMBED_CACHE_ENABLED: bool = os.getenv("EMBED_CACHE_ENABLED", "true").lower() == "true"
+    EMBED_CACHE_SIZE: int = int(os.getenv("EMBED_CACHE_SIZE", "10000"))
+    EMBED_CACHE_PATH: str = os.path.abspath(
+        os.getenv("EMBED_CACHE_PATH") or f"{CHROMA_PERSIST_DIR}_embedding_cache.sqlite3"
+    )
+    # SQLite store bounds: oldest rows beyond EMBED_CACHE_MAX_ROWS and rows older
+    # than EMBED_CACHE_MAX_AGE seconds are pruned; 0 disables either bound
+    EMBED_CACHE_MAX_ROWS: int = int(os.getenv("EMBED_CACHE_MAX_ROWS", "200000"))
+    EMBED_CACHE_MAX_AGE: float = float(os.getenv("EMBED_CACHE_MAX_AGE", str(30 * 86400)))
+
+    # Similarity search: "chroma" (HNSW, approximate) or "numpy" (exact, in-memory mirror)
+    SEARCH_BACKEND: str = os.getenv("SEARCH_BACKEND", "chroma")
+
+    # Query result cache (LRU entries, TTL seconds); 0 disables it
+    QUERY_CACHE_SIZE: int = int(os.getenv("QUERY_CACHE_SIZE", "1000"))
+    QUERY_CACHE_TTL: float = float(os.getenv("QUERY_CACHE_TTL", "300"))
+    # Collection write counter shared with the offline loaders; each process
+    # re-reads it at most every GENERATION_CHECK_SECONDS (0 = on every query)
+    COLLECTION_GENERATION_PATH: str = os.path.abspath(
+        os.getenv("COLLECTION_GENERATION_PATH") or f"{CHROMA_PERSIST_DIR}_generation.sqlite3"
+    )
+    GENERATION_CHECK_SECONDS: float = float(os.getenv("GENERATION_CHECK_SECONDS", "1"))
+
+    # Background ingestion jobs: persistent queue next to the Chroma directory
+    JOB_QUEUE_PATH: str = os.path.abspath(
+        os.getenv("JOB_QUEUE_PATH") or f"{CHROMA_PERSIST_DIR}_jobs.sqlite3"
+    )
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_RETENTION_SECONDS: int = int(os.getenv("JOB_RETENTION_SECONDS", "86400"))
 
 settings = Settings()
 
@@ -1,6 +1,27 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from app.api.routes import router
+from app.services.embedding_cache import embedding_cache
+from app.services.ollama_client import OllamaError, ollama_client
+from app.services.vector_service import ingestion_queue
 
-app = FastAPI(title="Vector CRUD with Ollama")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    ingestion_queue.start()
+    yield
+    ingestion_queue.stop()
+    await ollama_client.aclose()
+    if embedding_cache is not None:
+        embedding_cache.close()
+
+
+app = FastAPI(title="Vector CRUD with Ollama", lifespan=lifespan)
 
 app.include_router(router)
+
+
+@app.exception_handler(OllamaError)
+async def ollama_error_handler(request: Request, exc: OllamaError):
+    return JSONResponse(status_code=502, content={"detail": str(exc)})
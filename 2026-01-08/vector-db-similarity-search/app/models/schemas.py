@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
 
 class DocumentCreate(BaseModel):
     id: str
@@ -6,3 +7,11 @@ class DocumentCreate(BaseModel):
 
 class QueryRequest(BaseModel):
     query: str
+    n_results: int = Field(5, ge=1, le=100)
+    # Cosine distance: 0 is identical, 2 is opposite
+    max_distance: float = Field(0.25, ge=0, le=2)
+    # Chroma metadata filter, e.g. {"doc_id": "company_leave_policy"}
+    filters: Optional[Dict[str, Any]] = None
+
+class BatchQueryRequest(BaseModel):
+    queries: List[QueryRequest] = Field(..., min_length=1, max_length=1000)
@@ -0,0 +1,117 @@
+"""Offline ingest throughput benchmark: per-chunk vs batched embedding.
+
+Starts the fake Ollama server in-process (unless --ollama-url is given),
+builds a synthetic policy with --sections numbered sections and reports
+chunks/s for the old one-request-per-chunk path and for each batch size,
+plus a full add_document run into a scratch Chroma directory.
+
+    python -m app.scripts.bench_ingest --sections 200 --batch-sizes 1,16,64,256
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+# Keep benchmark vectors out of the real store unless one is configured
+os.environ.setdefault("CHROMA_PERSIST_DIR", tempfile.mkdtemp(prefix="bench_chroma_"))
+os.environ.setdefault("EMBEDDING_MODEL", "nomic-embed-text")
+
+from app.config.settings import settings
+from app.scripts.fake_ollama import FakeOllamaServer
+
+
+def synthetic_policy(sections: int) -> str:
+    lines = ["Synthetic Company Policy"]
+    for i in range(1, sections + 1):
+        lines.append(
+            f"{i}. Employees must follow rule {i} covering leave, security and conduct "
+            f"requirements for team {i % 17} and location {i % 5}."
+        )
+    return "\n".join(lines)
+
+
+def timed(func, *args) -> float:
+    started = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - started
+
+
+def throughput(chunks: int, seconds: float) -> dict:
+    return {
+        "seconds": round(seconds, 3),
+        "chunks_per_s": round(chunks / seconds, 1) if seconds else 0.0
+    }
+
+
+def run(sections: int, batch_sizes: list) -> dict:
+    from app.services.embedding_cache import embedding_cache
+    from app.services.embedding_service import generate_embedding, generate_embeddings
+    from app.services.ollama_client import ollama_client
+    from app.services.vector_service import add_document, chunk_text, collection
+
+    def cold(func, *args) -> float:
+        # Every embedding measurement starts from an empty cache
+        if embedding_cache is not None:
+            embedding_cache.clear()
+        return timed(func, *args)
+
+    chunks = chunk_text(synthetic_policy(sections))
+    report = {"chunks": len(chunks), "ollama_url": settings.OLLAMA_BASE_URL}
+
+    report["per_chunk"] = throughput(len(chunks), cold(lambda: [generate_embedding(c) for c in chunks]))
+    report["batched"] = {
+        str(size): throughput(len(chunks), cold(generate_embeddings, chunks, size))
+        for size in batch_sizes
+    }
+
+    doc_id = "bench_ingest_policy"
+    collection.delete(where={"doc_id": doc_id})
+    report["add_document"] = throughput(len(chunks), cold(add_document, doc_id, synthetic_policy(sections)))
+    report["add_document"]["batch_size"] = settings.EMBED_BATCH_SIZE
+    collection.delete(where={"doc_id": doc_id})
+    if embedding_cache is not None:
+        # Re-ingesting unchanged text is answered by the embedding cache
+        report["add_document_cached"] = throughput(len(chunks), timed(add_document, doc_id, synthetic_policy(sections)))
+        report["embedding_cache"] = embedding_cache.stats()
+        collection.delete(where={"doc_id": doc_id})
+    report["vector_count"] = collection.count()
+    report["ollama_client"] = ollama_client.snapshot()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, default=200)
+    parser.add_argument("--batch-sizes", default="1,16,64,256")
+    parser.add_argument("--ollama-url", help="benchmark a real Ollama instead of the fake server")
+    parser.add_argument("--request-latency-ms", type=float, default=20.0)
+    parser.add_argument("--input-latency-ms", type=float, default=2.0)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    server = None
+    if args.ollama_url:
+        settings.OLLAMA_BASE_URL = args.ollama_url
+    else:
+        server = FakeOllamaServer(request_latency_ms=args.request_latency_ms,
+                                  input_latency_ms=args.input_latency_ms).start()
+        settings.OLLAMA_BASE_URL = server.url
+
+    try:
+        report = run(args.sections, [int(size) for size in args.batch_sizes.split(",")])
+        if server is not None:
+            report["fake_ollama_requests"] = server.requests
+            report["fake_ollama_max_in_flight"] = server.max_in_flight
+    finally:
+        if server is not None:
+            server.stop()
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Offline search benchmark: Chroma HNSW vs exact NumPy search.
+
+Fills a scratch Chroma collection (cosine space, in a temp directory) with
+--vectors synthetic clustered vectors, then reports p50/p95 latency for
+single queries and for --batch queries at a time through both backends,
+plus the HNSW recall@k measured against the exact NumPy results. No
+embedding model is involved; queries are perturbed corpus vectors.
+
+    python -m app.scripts.bench_search --vectors 20000 --dim 768 --k 5
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+# Settings need a Chroma directory; keep it scratch unless one is configured
+os.environ.setdefault("CHROMA_PERSIST_DIR", tempfile.mkdtemp(prefix="bench_chroma_"))
+
+import chromadb
+import numpy as np
+
+from app.services.search_backend import ChromaSearchBackend, NumpySearchBackend
+
+
+def clustered_vectors(rng, count: int, dim: int, clusters: int) -> np.ndarray:
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=count)
+    return centers[labels] + 0.35 * rng.normal(size=(count, dim)).astype(np.float32)
+
+
+def percentiles(samples: list) -> dict:
+    ms = np.asarray(samples) * 1000
+    return {"p50_ms": round(float(np.percentile(ms, 50)), 3), "p95_ms": round(float(np.percentile(ms, 95)), 3)}
+
+
+def latency(backend, queries: np.ndarray, batch: int, k: int) -> dict:
+    samples = []
+    for start in range(0, len(queries), batch):
+        chunk = queries[start:start + batch].tolist()
+        started = time.perf_counter()
+        backend.query(chunk, k)
+        samples.append(time.perf_counter() - started)
+    report = percentiles(samples)
+    report["queries_per_s"] = round(len(queries) / sum(samples), 1)
+    return report
+
+
+def recall(approximate: dict, exact: dict, k: int) -> float:
+    hits = sum(len(set(a) & set(e)) for a, e in zip(approximate["ids"], exact["ids"]))
+    return round(hits / (k * len(exact["ids"])), 4)
+
+
+def run(vectors: int, dim: int, clusters: int, queries: int, batch: int, k: int, seed: int) -> dict:
+    rng = np.random.default_rng(seed)
+    corpus = clustered_vectors(rng, vectors, dim, clusters)
+    probes = corpus[rng.integers(0, vectors, size=queries)] + 0.1 * rng.normal(size=(queries, dim)).astype(np.float32)
+
+    client = chromadb.PersistentClient(path=tempfile.mkdtemp(prefix="bench_search_"))
+    scratch = client.get_or_create_collection("bench_search", metadata={"hnsw:space": "cosine"})
+    ids = [f"v{i}" for i in range(vectors)]
+    started = time.perf_counter()
+    write_batch = client.get_max_batch_size()
+    for start in range(0, vectors, write_batch):
+        end = start + write_batch
+        scratch.add(
+            ids=ids[start:end],
+            embeddings=corpus[start:end].tolist(),
+            documents=ids[start:end],
+            metadatas=[{"doc_id": f"d{i % clusters}"} for i in range(start, min(end, vectors))]
+        )
+    report = {
+        "vectors": vectors,
+        "dim": dim,
+        "queries": queries,
+        "batch": batch,
+        "k": k,
+        "chroma_add_s": round(time.perf_counter() - started, 3)
+    }
+
+    chroma = ChromaSearchBackend(scratch)
+    exact = NumpySearchBackend(scratch)
+    started = time.perf_counter()
+    exact.reload()
+    report["numpy_load_s"] = round(time.perf_counter() - started, 3)
+
+    for backend in (chroma, exact):
+        report[backend.name] = {
+            "single": latency(backend, probes, 1, k),
+            "batched": latency(backend, probes, batch, k)
+        }
+    report["chroma_recall_at_k"] = recall(chroma.query(probes.tolist(), k), exact.query(probes.tolist(), k), k)
+    report["numpy_index"] = exact.stats()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--batch", type=int, default=32, help="queries per batched call")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = run(args.vectors, args.dim, args.clusters, args.queries, args.batch, args.k, args.seed)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
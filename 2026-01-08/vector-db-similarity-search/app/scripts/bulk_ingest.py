@@ -0,0 +1,265 @@
+"""Parallel bulk ingestion of a document corpus into Chroma.
+
+The corpus is either a directory (every .txt / .md file is one document,
+doc_id = path relative to the directory without the extension) or a JSONL
+file with one {"id": ..., "text": ...} object per line. Documents are read
+as a stream in windows:
+
+- chunking runs in a process pool, one window ahead of embedding;
+- chunks are embedded in EMBED_BATCH_SIZE batches by concurrent threads,
+  bounded by the shared Ollama client's OLLAMA_MAX_CONCURRENCY;
+- vectors are upserted in batches of the Chroma client's max batch size
+  by a writer thread, overlapping with embedding of the next window, and
+  chunks left over from a longer earlier version of a document are deleted;
+- after each window the checkpoint records how many documents are stored,
+  so an interrupted run resumes after the last completed window.
+
+Each written window bumps the persisted collection generation, so a running
+API drops its cached query results and, with SEARCH_BACKEND=numpy, reloads
+its mirror within GENERATION_CHECK_SECONDS.
+
+    python -m app.scripts.bulk_ingest data/documents
+    python -m app.scripts.bulk_ingest corpus.jsonl --window 500 --chunk-workers 8
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+
+from app.config.settings import settings
+from app.db.chroma_client import client, collection
+from app.services.chunking import chunk_id_for, chunk_metadata, chunk_text
+from app.services.embedding_service import generate_embeddings
+from app.services.query_cache import collection_generation
+
+DOCUMENT_EXTENSIONS = (".txt", ".md")
+DEFAULT_WINDOW = 256
+DEFAULT_MAX_BATCH_SIZE = 5000
+
+
+def iter_corpus(path: str):
+    """Yield (doc_id, text) in a stable order, reading one document at a time."""
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith(DOCUMENT_EXTENSIONS):
+                    file_path = os.path.join(root, name)
+                    doc_id = os.path.splitext(os.path.relpath(file_path, path))[0].replace(os.sep, "/")
+                    with open(file_path, encoding="utf-8") as f:
+                        yield doc_id, f.read()
+    else:
+        with open(path, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                if line.strip():
+                    record = json.loads(line)
+                    if "id" not in record or "text" not in record:
+                        raise ValueError(f"{path}:{line_no}: expected an object with 'id' and 'text'")
+                    yield str(record["id"]), record["text"]
+
+
+def chunk_document(doc: tuple) -> tuple:
+    doc_id, text = doc
+    return doc_id, chunk_text(text)
+
+
+def max_batch_size() -> int:
+    try:
+        return client.get_max_batch_size()
+    except AttributeError:
+        return getattr(client, "max_batch_size", DEFAULT_MAX_BATCH_SIZE)
+
+
+class Checkpoint:
+    """Number of corpus documents already stored, tied to the corpus path."""
+
+    def __init__(self, path: str, corpus: str):
+        self.path = path
+        self.corpus = os.path.abspath(corpus)
+        self.docs_done = 0
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("corpus") == self.corpus:
+                self.docs_done = state.get("docs_done", 0)
+
+    def save(self, docs_done: int):
+        self.docs_done = docs_done
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"corpus": self.corpus, "docs_done": docs_done, "updated_at": time.time()}, f)
+        os.replace(tmp_path, self.path)
+
+
+class Stats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.docs = 0
+        self.chunks = 0
+        self.skipped_docs = 0
+        self.chunk_wait_s = 0.0
+        self.embed_wait_s = 0.0
+        self.write_wait_s = 0.0
+
+    def report(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "docs": self.docs,
+            "chunks": self.chunks,
+            "skipped_docs": self.skipped_docs,
+            "elapsed_s": round(elapsed, 3),
+            "docs_per_s": round(self.docs / elapsed, 1) if elapsed else 0.0,
+            "chunks_per_s": round(self.chunks / elapsed, 1) if elapsed else 0.0,
+            "chunk_wait_s": round(self.chunk_wait_s, 3),
+            "embed_wait_s": round(self.embed_wait_s, 3),
+            "write_wait_s": round(self.write_wait_s, 3)
+        }
+
+
+def embed_window(chunked: list, embed_pool: ThreadPoolExecutor, batch_size: int, stats: Stats) -> dict:
+    ids, documents, metadatas = [], [], []
+    for doc_id, chunks in chunked:
+        for i, chunk in enumerate(chunks):
+            ids.append(chunk_id_for(doc_id, i))
+            documents.append(chunk)
+            metadatas.append(chunk_metadata(doc_id, i, chunk))
+
+    started = time.perf_counter()
+    futures = [
+        embed_pool.submit(generate_embeddings, documents[start:start + batch_size], batch_size)
+        for start in range(0, len(documents), batch_size)
+    ]
+    embeddings = [embedding for future in futures for embedding in future.result()]
+    stats.embed_wait_s += time.perf_counter() - started
+    return {
+        "doc_ids": [doc_id for doc_id, _ in chunked],
+        "ids": ids,
+        "documents": documents,
+        "metadatas": metadatas,
+        "embeddings": embeddings
+    }
+
+
+def write_window(batch: dict, write_batch_size: int) -> int:
+    ids = batch["ids"]
+    for start in range(0, len(ids), write_batch_size):
+        end = start + write_batch_size
+        # upsert keeps a resumed window idempotent
+        collection.upsert(
+            ids=ids[start:end],
+            documents=batch["documents"][start:end],
+            embeddings=batch["embeddings"][start:end],
+            metadatas=batch["metadatas"][start:end]
+        )
+    # A document that now has fewer chunks keeps its old tail unless it is deleted,
+    # after the upsert like update_document, so readers never see it missing
+    new_ids = set(ids)
+    stored = collection.get(where={"doc_id": {"$in": batch["doc_ids"]}}, include=[])
+    surplus = [chunk_id for chunk_id in stored["ids"] if chunk_id not in new_ids]
+    for start in range(0, len(surplus), write_batch_size):
+        collection.delete(ids=surplus[start:start + write_batch_size])
+    collection_generation.bump()
+    return len(ids)
+
+
+def bulk_ingest(corpus: str, checkpoint_path: str = None, window: int = DEFAULT_WINDOW,
+                chunk_workers: int = None, embed_workers: int = None, batch_size: int = None,
+                progress=None) -> dict:
+    batch_size = batch_size or settings.EMBED_BATCH_SIZE
+    embed_workers = embed_workers or settings.OLLAMA_MAX_CONCURRENCY
+    chunk_workers = chunk_workers or os.cpu_count() or 1
+    write_batch_size = max_batch_size()
+    checkpoint = Checkpoint(checkpoint_path, corpus)
+    stats = Stats()
+    stats.skipped_docs = checkpoint.docs_done
+
+    docs = islice(iter_corpus(corpus), checkpoint.docs_done, None)
+    windows = iter(lambda: list(islice(docs, window)), [])
+
+    with ProcessPoolExecutor(chunk_workers) as chunk_pool, \
+            ThreadPoolExecutor(embed_workers) as embed_pool, \
+            ThreadPoolExecutor(1) as writer:
+        def chunk_next():
+            batch = next(windows, None)
+            if batch is None:
+                return None
+            chunksize = max(1, len(batch) // (chunk_workers * 4))
+            return len(batch), chunk_pool.map(chunk_document, batch, chunksize=chunksize)
+
+        def finish_write(write):
+            # Only checkpoint once a window is durably in Chroma
+            future, size = write
+            started = time.perf_counter()
+            stats.chunks += future.result()
+            stats.write_wait_s += time.perf_counter() - started
+            stats.docs += size
+            checkpoint.save(checkpoint.docs_done + size)
+            if progress is not None:
+                progress(stats.report())
+
+        pending = chunk_next()
+        writing = None
+        while pending is not None:
+            size, chunked = pending
+            started = time.perf_counter()
+            chunked = list(chunked)
+            stats.chunk_wait_s += time.perf_counter() - started
+            # Chunk the next window in the process pool while this one is embedded
+            pending = chunk_next()
+
+            # ...and embed this window while the previous one is written
+            batch = embed_window(chunked, embed_pool, batch_size, stats)
+            if writing is not None:
+                finish_write(writing)
+            writing = (writer.submit(write_window, batch, write_batch_size), size)
+
+        if writing is not None:
+            finish_write(writing)
+
+    report = stats.report()
+    report["checkpoint_docs_done"] = checkpoint.docs_done
+    report["write_batch_size"] = write_batch_size
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel bulk corpus ingestion into Chroma")
+    parser.add_argument("corpus", help="directory of .txt/.md files or a JSONL file of {id, text}")
+    parser.add_argument("--checkpoint", help="progress file (default: <corpus>.checkpoint.json)")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW, help="documents per pipeline window")
+    parser.add_argument("--chunk-workers", type=int, help="chunking processes (default: CPU count)")
+    parser.add_argument("--embed-workers", type=int, help="concurrent embedding batches")
+    parser.add_argument("--batch-size", type=int, help="chunks per embedding request")
+    args = parser.parse_args()
+
+    checkpoint = args.checkpoint or f"{os.path.abspath(args.corpus).rstrip(os.sep)}.checkpoint.json"
+    if args.restart and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+    def progress(report):
+        print(
+            f"{report['docs']} docs, {report['chunks']} chunks, "
+            f"{report['docs_per_s']} docs/s, {report['chunks_per_s']} chunks/s",
+            file=sys.stderr
+        )
+
+    report = bulk_ingest(
+        args.corpus,
+        checkpoint_path=checkpoint,
+        window=args.window,
+        chunk_workers=args.chunk_workers,
+        embed_workers=args.embed_workers,
+        batch_size=args.batch_size,
+        progress=progress
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
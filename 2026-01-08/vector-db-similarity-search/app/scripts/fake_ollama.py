@@ -0,0 +1,146 @@
+"""Local stand-in for the Ollama embedding API, for offline tests and benchmarks.
+
+Serves POST /api/embed ({"input": str | [str]}) and the legacy
+POST /api/embeddings ({"prompt": str}). Embeddings are deterministic
+hashed bag-of-words vectors, so texts sharing words are close in cosine space.
+Latency is simulated per request and per input to mimic model cost, and
+`fail_requests` makes the next requests answer 503.
+
+    python -m app.scripts.fake_ollama --port 11434 --request-latency-ms 20 --input-latency-ms 2
+"""
+import argparse
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_DIMENSIONS = 768
+
+
+def fake_embedding(text: str, dimensions: int = DEFAULT_DIMENSIONS) -> list:
+    vector = [0.0] * dimensions
+    for token in re.findall(r"\w+", text.lower()):
+        digest = hashlib.sha1(token.encode("utf-8")).digest()
+        index = int.from_bytes(digest[:4], "big") % dimensions
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    server_version = "FakeOllama/1.0"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)) or 0)
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            return self._send(400, {"error": "invalid JSON"})
+
+        if self.path == "/api/embed":
+            inputs = payload.get("input", [])
+            if isinstance(inputs, str):
+                inputs = [inputs]
+            key = "embeddings"
+        elif self.path == "/api/embeddings":
+            inputs = [payload.get("prompt", "")]
+            key = "embedding"
+        else:
+            return self._send(404, {"error": "not found"})
+
+        if self.server.take_failure():
+            return self._send(503, {"error": "model is loading"})
+        self.server.record(len(inputs))
+        try:
+            time.sleep((self.server.request_latency_ms + self.server.input_latency_ms * len(inputs)) / 1000)
+        finally:
+            self.server.done()
+        embeddings = [fake_embedding(text, self.server.dimensions) for text in inputs]
+        result = embeddings if key == "embeddings" else embeddings[0]
+        self._send(200, {"model": payload.get("model"), key: result})
+
+    def _send(self, status: int, payload: dict):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, dimensions: int = DEFAULT_DIMENSIONS,
+                 request_latency_ms: float = 0.0, input_latency_ms: float = 0.0):
+        super().__init__((host, port), FakeOllamaHandler)
+        self.dimensions = dimensions
+        self.request_latency_ms = request_latency_ms
+        self.input_latency_ms = input_latency_ms
+        self.requests = 0
+        self.inputs = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        # The next N embed requests answer 503, to exercise client retries
+        self.fail_requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, inputs: int):
+        with self._lock:
+            self.requests += 1
+            self.inputs += inputs
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def done(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def take_failure(self) -> bool:
+        with self._lock:
+            if self.fail_requests > 0:
+                self.fail_requests -= 1
+                return True
+            return False
+
+    def start(self):
+        """Serve from a daemon thread; returns self so it can be used inline."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Ollama embedding server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--dimensions", type=int, default=DEFAULT_DIMENSIONS)
+    parser.add_argument("--request-latency-ms", type=float, default=20.0)
+    parser.add_argument("--input-latency-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    server = FakeOllamaServer(args.host, args.port, args.dimensions,
+                              args.request_latency_ms, args.input_latency_ms)
+    print(f"Fake Ollama listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
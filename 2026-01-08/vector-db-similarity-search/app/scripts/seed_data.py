@@ -2,27 +2,16 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
-import chromadb
 from app.config.settings import settings
+from app.db.chroma_client import collection
 from app.services.embedding_service import generate_embedding
-import re
+from app.services.query_cache import collection_generation
 
-def chunk_text(text: str):
-    sections = re.split(r"\n\d+\.\s+", text)
-    chunks = []
-    for section in sections:
-        cleaned = section.strip()
-        if cleaned:
-            chunks.append(cleaned)
-    return chunks
+# For whole corpora use the parallel bulk loader: python -m app.scripts.bulk_ingest <dir|jsonl>
 
 def seed_test_data():
     print(f"🔧 Using Chroma at: {settings.CHROMA_PERSIST_DIR}")
     
-    # Initializing client directly
-    client = chromadb.PersistentClient(path=settings.CHROMA_PERSIST_DIR)
-    collection = client.get_or_create_collection(name="company_policies")
-    
     print(f"Initial collection count: {collection.count()}")
     
     test_documents = [
@@ -46,6 +35,7 @@ def seed_test_data():
                 ids=[doc['id']],
                 metadatas=[{"doc_id": doc['id'], "source": "seed"}]
             )
+            collection_generation.bump()
             
             print(f" Added to collection")
             print(f"New count: {collection.count()}")
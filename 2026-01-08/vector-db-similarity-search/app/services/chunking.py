@@ -0,0 +1,30 @@
+import hashlib
+import re
+
+
+def chunk_text(text: str):
+    sections = re.split(r"\n\d+\.\s+", text)
+
+    chunks = []
+    for section in sections:
+        cleaned = section.strip()
+        if cleaned:
+            chunks.append(cleaned)
+
+    return chunks
+
+
+def chunk_hash(chunk: str) -> str:
+    return hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+
+
+def chunk_id_for(doc_id: str, index: int) -> str:
+    return f"{doc_id}_chunk_{index}"
+
+
+def chunk_metadata(doc_id: str, index: int, chunk: str) -> dict:
+    return {
+        "doc_id": doc_id,
+        "chunk_id": chunk_id_for(doc_id, index),
+        "content_hash": chunk_hash(chunk)
+    }
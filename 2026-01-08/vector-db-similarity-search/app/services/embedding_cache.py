@@ -0,0 +1,206 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+
+from app.config.settings import settings
+
+# Stay under SQLite's bound-parameter limit on older builds
+SQLITE_LOOKUP_BATCH = 500
+# Age-based pruning runs at most this often; the row cap is checked on every write
+PRUNE_INTERVAL = 3600
+# Pruning for the row cap goes down to this fraction of it, so it does not run on every write
+PRUNE_TARGET_RATIO = 0.9
+
+
+def normalize_text(text: str) -> str:
+    # Whitespace and Unicode form do not change meaning, so they should not miss the cache
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def cache_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Content-addressed embedding cache: an in-memory LRU over a SQLite store.
+
+    Keys are sha256(model, normalized text); vectors are stored on disk as
+    float32 blobs. The store only ever holds one model: when EMBEDDING_MODEL
+    changes, entries for every other model are evicted. It is also bounded:
+    rows older than `max_age` seconds and the oldest rows beyond `max_disk_rows`
+    are pruned on write, since every distinct query text ends up here.
+    """
+
+    def __init__(self, path: str = None, max_memory_items: int = None,
+                 max_disk_rows: int = None, max_age: float = None):
+        self.path = path or settings.EMBED_CACHE_PATH
+        self.max_memory_items = max_memory_items or settings.EMBED_CACHE_SIZE
+        self.max_disk_rows = settings.EMBED_CACHE_MAX_ROWS if max_disk_rows is None else max_disk_rows
+        self.max_age = settings.EMBED_CACHE_MAX_AGE if max_age is None else max_age
+        self.model = None
+        self._memory = OrderedDict()
+        self._conn = None
+        self._lock = threading.Lock()
+        self._disk_rows = None
+        self._last_prune = 0.0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.pruned = 0
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, model TEXT NOT NULL, dim INTEGER NOT NULL, "
+                "vector BLOB NOT NULL, created REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS embeddings_created ON embeddings (created)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            self._conn = conn
+        return self._conn
+
+    def _sync_model(self):
+        """Evict everything embedded by another model; called under the lock."""
+        model = settings.EMBEDDING_MODEL or ""
+        if model == self.model:
+            return
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM embeddings WHERE model != ?", (model,))
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('model', ?)", (model,))
+        self._memory.clear()
+        self._disk_rows = None
+        self.model = model
+
+    def _prune(self, now: float):
+        """Drop expired rows, then the oldest rows over the cap; called under the lock."""
+        conn = self._connect()
+        with conn:
+            deleted = 0
+            if self.max_age > 0:
+                deleted += conn.execute("DELETE FROM embeddings WHERE created < ?", (now - self.max_age,)).rowcount
+            rows = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            if self.max_disk_rows > 0 and rows > self.max_disk_rows:
+                excess = rows - int(self.max_disk_rows * PRUNE_TARGET_RATIO)
+                deleted += conn.execute(
+                    "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY created LIMIT ?)",
+                    (excess,)
+                ).rowcount
+                rows -= excess
+        self.pruned += deleted
+        self._disk_rows = rows
+        self._last_prune = now
+
+    def _remember(self, key: str, vector: list):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def get_many(self, texts: list) -> list:
+        """Return a vector or None per text, promoting disk hits into memory."""
+        with self._lock:
+            self._sync_model()
+            keys = [cache_key(self.model, text) for text in texts]
+            found = {}
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+
+            missing = list({key for key in keys if key not in found})
+            disk_keys = set()
+            for start in range(0, len(missing), SQLITE_LOOKUP_BATCH):
+                batch = missing[start:start + SQLITE_LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._connect().execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f", blob).tolist()
+                    found[key] = vector
+                    disk_keys.add(key)
+                    self._remember(key, vector)
+
+            results = []
+            for key in keys:
+                vector = found.get(key)
+                if vector is None:
+                    self.misses += 1
+                elif key in disk_keys:
+                    self.disk_hits += 1
+                    disk_keys.discard(key)
+                else:
+                    self.memory_hits += 1
+                results.append(vector)
+            return results
+
+    def put_many(self, texts: list, vectors: list):
+        with self._lock:
+            self._sync_model()
+            now = time.time()
+            rows = []
+            for text, vector in zip(texts, vectors):
+                key = cache_key(self.model, text)
+                self._remember(key, vector)
+                rows.append((key, self.model, len(vector), array("f", vector).tobytes(), now))
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, model, dim, vector, created) VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+            # Replaced keys make this an overestimate, which only prunes early
+            if self._disk_rows is not None:
+                self._disk_rows += len(rows)
+            over_cap = self.max_disk_rows > 0 and (self._disk_rows is None or self._disk_rows > self.max_disk_rows)
+            if over_cap or now - self._last_prune >= PRUNE_INTERVAL:
+                self._prune(now)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            disk_entries = 0
+            if self._conn is not None:
+                disk_entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            return {
+                "model": self.model,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_max_entries": self.max_memory_items,
+                "disk_entries": disk_entries,
+                "disk_max_entries": self.max_disk_rows,
+                "pruned": self.pruned,
+                "path": self.path
+            }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute("DELETE FROM embeddings")
+            self._disk_rows = None
+            self.memory_hits = self.disk_hits = self.misses = self.pruned = 0
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self.model = None
+
+
+embedding_cache = EmbeddingCache() if settings.EMBED_CACHE_ENABLED else None
@@ -1,16 +1,69 @@
-import requests
 from app.config.settings import settings
+from app.services.embedding_cache import embedding_cache
+from app.services.ollama_client import ollama_client
+
+
+def _batches(texts: list, batch_size: int = None):
+    batch_size = batch_size or settings.EMBED_BATCH_SIZE
+    for start in range(0, len(texts), batch_size):
+        batch = texts[start:start + batch_size]
+        yield batch, {"model": settings.EMBEDDING_MODEL, "input": batch}
+
+
+def _check_batch(batch: list, data: dict) -> list:
+    embeddings = data["embeddings"]
+    if len(embeddings) != len(batch):
+        raise ValueError(
+            f"Expected {len(batch)} embeddings from Ollama, got {len(embeddings)}"
+        )
+    return embeddings
+
+
+def _cache_lookup(texts: list):
+    """Cached vectors (None where missing) and the distinct texts still to embed."""
+    if embedding_cache is None:
+        return [None] * len(texts), list(dict.fromkeys(texts))
+    cached = embedding_cache.get_many(texts)
+    missing = [text for text, vector in zip(texts, cached) if vector is None]
+    return cached, list(dict.fromkeys(missing))
+
+
+def _merge(texts: list, cached: list, missing: list, fresh: list) -> list:
+    if embedding_cache is not None and missing:
+        embedding_cache.put_many(missing, fresh)
+    by_text = dict(zip(missing, fresh))
+    return [vector if vector is not None else by_text[text] for text, vector in zip(texts, cached)]
+
+
+def generate_embeddings(texts: list, batch_size: int = None, on_batch=None) -> list:
+    """Embed many texts in input order, with one /api/embed request per batch of cache misses.
+
+    `on_batch`, if given, is called with the number of texts resolved so far.
+    """
+    cached, missing = _cache_lookup(texts)
+    resolved = len(texts) - len(missing)
+    if on_batch is not None:
+        on_batch(resolved)
+    fresh = []
+    for batch, payload in _batches(missing, batch_size):
+        fresh.extend(_check_batch(batch, ollama_client.post("/api/embed", payload)))
+        if on_batch is not None:
+            on_batch(resolved + len(fresh))
+    return _merge(texts, cached, missing, fresh)
+
+
+async def generate_embeddings_async(texts: list, batch_size: int = None) -> list:
+    cached, missing = _cache_lookup(texts)
+    fresh = []
+    for batch, payload in _batches(missing, batch_size):
+        fresh.extend(_check_batch(batch, await ollama_client.post_async("/api/embed", payload)))
+    return _merge(texts, cached, missing, fresh)
+
 
 def generate_embedding(text: str) -> list:
-    payload = {
-        "model": settings.EMBEDDING_MODEL,
-        "prompt": text
-    }
-
-    response = requests.post(
-        f"{settings.OLLAMA_BASE_URL}/api/embeddings",
-        json=payload
-    )
-
-    response.raise_for_status()
-    return response.json()["embedding"]
+    # Same endpoint as document chunks, so queries and chunks share one vector space
+    return generate_embeddings([text])[0]
+
+
+async def generate_embedding_async(text: str) -> list:
+    return (await generate_embeddings_async([text]))[0]
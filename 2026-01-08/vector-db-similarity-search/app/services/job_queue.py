@@ -0,0 +1,224 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from app.config.settings import settings
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+JOB_FIELDS = (
+    "id", "doc_id", "status", "chunks_total", "chunks_embedded", "chunks_stored",
+    "error", "result", "cancel_requested", "created_at", "started_at", "finished_at"
+)
+
+
+class JobCancelled(Exception):
+    """Raised by a job's progress reporter once the job has been cancelled."""
+
+
+class IngestionQueue:
+    """Persistent SQLite job queue drained by a bounded pool of worker threads.
+
+    There is at most one queued job per doc_id: submitting again while a job
+    is still queued replaces its text and returns the same job id, so rapid
+    successive updates collapse into one ingestion. Jobs for the same doc_id
+    never run concurrently. Jobs left running by a crash are re-queued on start,
+    unless a newer job for the same doc_id is already queued.
+    Cancelling a running job only flags it: it stays running, so no other job
+    for its doc_id starts, until its next progress report raises JobCancelled
+    and the worker records it as cancelled. Handlers should report before each write.
+    """
+
+    def __init__(self, handler, path: str = None, workers: int = None):
+        self.handler = handler
+        self.path = path or settings.JOB_QUEUE_PATH
+        self.workers = workers or settings.JOB_WORKERS
+        self._conn = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._threads = []
+        self._stopping = False
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, doc_id TEXT NOT NULL, text TEXT, status TEXT NOT NULL, "
+                "chunks_total INTEGER NOT NULL DEFAULT 0, chunks_embedded INTEGER NOT NULL DEFAULT 0, "
+                "chunks_stored INTEGER NOT NULL DEFAULT 0, error TEXT, result TEXT, "
+                "cancel_requested INTEGER NOT NULL DEFAULT 0, "
+                "created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+            )
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "cancel_requested" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN cancel_requested INTEGER NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_doc_status ON jobs (doc_id, status)")
+            self._conn = conn
+        return self._conn
+
+    # Lifecycle
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            conn = self._connect()
+            with conn:
+                # A crashed job is superseded by a queued one for its doc_id, or by a pending cancel
+                conn.execute(
+                    "UPDATE jobs SET status = ?, finished_at = ? WHERE status = ? AND (cancel_requested = 1 "
+                    "OR doc_id IN (SELECT doc_id FROM jobs WHERE status = ?))",
+                    (CANCELLED, time.time(), RUNNING, QUEUED)
+                )
+                conn.execute("UPDATE jobs SET status = ?, started_at = NULL WHERE status = ?", (QUEUED, RUNNING))
+                conn.execute(
+                    "DELETE FROM jobs WHERE status IN (?, ?, ?) AND finished_at < ?",
+                    (DONE, FAILED, CANCELLED, time.time() - settings.JOB_RETENTION_SECONDS)
+                )
+            self._stopping = False
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"ingest-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        with self._lock:
+            self._stopping = True
+            self._wakeup.notify_all()
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join(timeout)
+        with self._lock:
+            # A worker still inside a handler will write its result when it returns
+            if self._conn is not None and not any(thread.is_alive() for thread in threads):
+                self._conn.close()
+                self._conn = None
+
+    # Producer side
+    def submit(self, doc_id: str, text: str) -> dict:
+        self.start()
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE doc_id = ? AND status = ?", (doc_id, QUEUED)
+                ).fetchone()
+                if row is not None:
+                    job_id = row["id"]
+                    conn.execute("UPDATE jobs SET text = ? WHERE id = ?", (text, job_id))
+                else:
+                    job_id = uuid.uuid4().hex
+                    conn.execute(
+                        "INSERT INTO jobs (id, doc_id, text, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                        (job_id, doc_id, text, QUEUED, now)
+                    )
+            self._wakeup.notify()
+            return {"job_id": job_id, "doc_id": doc_id, "status": QUEUED, "deduplicated": row is not None}
+
+    def cancel(self, doc_id: str) -> int:
+        """Cancel queued and running jobs for a doc_id, e.g. because the document was deleted.
+
+        Queued jobs are cancelled outright; running ones are flagged and end at their next report.
+        """
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                queued = conn.execute(
+                    "UPDATE jobs SET status = ?, finished_at = ? WHERE doc_id = ? AND status = ?",
+                    (CANCELLED, time.time(), doc_id, QUEUED)
+                )
+                running = conn.execute(
+                    "UPDATE jobs SET cancel_requested = 1 WHERE doc_id = ? AND status = ?", (doc_id, RUNNING)
+                )
+            return queued.rowcount + running.rowcount
+
+    def get(self, job_id: str):
+        with self._lock:
+            row = self._connect().execute(
+                f"SELECT {', '.join(JOB_FIELDS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        return job
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._connect().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {"workers": self.workers, **{status: count for status, count in rows}}
+
+    # Worker side
+    def _claim(self):
+        """Oldest queued job whose document is not already being ingested; called under the lock."""
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT id, doc_id, text FROM jobs WHERE status = ? AND doc_id NOT IN "
+            "(SELECT doc_id FROM jobs WHERE status = ?) ORDER BY created_at LIMIT 1",
+            (QUEUED, RUNNING)
+        ).fetchone()
+        if row is None:
+            return None
+        with conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, started_at = ? WHERE id = ?", (RUNNING, time.time(), row["id"])
+            )
+        return dict(row)
+
+    def _progress(self, job_id: str):
+        def report(**counts):
+            assignments = ", ".join(f"{field} = ?" for field in counts)
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    cursor = conn.execute(
+                        f"UPDATE jobs SET {assignments} WHERE id = ? AND cancel_requested = 0",
+                        (*counts.values(), job_id)
+                    )
+            if cursor.rowcount == 0:
+                raise JobCancelled(job_id)
+        return report
+
+    def _finish(self, job_id: str, status: str, result: dict = None, error: str = None):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, result = ?, error = ?, text = NULL, finished_at = ? WHERE id = ?",
+                    (status, json.dumps(result) if result is not None else None, error, time.time(), job_id)
+                )
+            # A finished job can unblock a queued job for the same document
+            self._wakeup.notify_all()
+
+    def _work(self):
+        while True:
+            with self._lock:
+                job = None
+                while not self._stopping:
+                    job = self._claim()
+                    if job is not None:
+                        break
+                    self._wakeup.wait(timeout=1.0)
+                if self._stopping:
+                    return
+            try:
+                result = self.handler(job["doc_id"], job["text"], self._progress(job["id"]))
+            except JobCancelled:
+                self._finish(job["id"], CANCELLED)
+            except Exception as e:
+                self._finish(job["id"], FAILED, error=str(e))
+            else:
+                self._finish(job["id"], DONE, result=result)
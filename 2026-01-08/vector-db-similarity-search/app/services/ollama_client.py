@@ -0,0 +1,319 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.config.settings import settings
+
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class OllamaError(RuntimeError):
+    pass
+
+
+class RetryBudget:
+    """Token bucket that caps retries to a fraction of recent traffic.
+
+    Every request deposits `ratio` tokens and every retry spends one, so a
+    struggling Ollama sees at most ~ratio extra load instead of a retry storm.
+    `min_retries` tokens are always available for low-traffic periods.
+    """
+
+    def __init__(self, ratio: float, min_retries: int):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.max_tokens = max(min_retries, 1) * 10
+        self._tokens = float(min_retries)
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    @property
+    def tokens(self) -> float:
+        return self._tokens
+
+
+class ConcurrencyLimiter:
+    """Semaphore shared by threads and coroutines, handing freed slots over in FIFO order.
+
+    A blocked thread waits on an Event; a blocked coroutine waits on a future
+    of its own event loop, so a queue of async callers holds no threads.
+    release() passes the slot straight to the oldest waiter.
+    """
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self._free = slots
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def acquire(self):
+        with self._lock:
+            if self._free:
+                self._free -= 1
+                return
+            waiter = threading.Event()
+            self._waiters.append(waiter)
+        waiter.wait()
+
+    async def acquire_async(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._free:
+                self._free -= 1
+                return
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                queued = waiter in self._waiters
+                if queued:
+                    self._waiters.remove(waiter)
+            # Handed the slot just before the cancel landed: pass it on. If the
+            # future itself was cancelled, _wake passes it on instead.
+            if not queued and waiter[1].done() and not waiter[1].cancelled():
+                self.release()
+            raise
+
+    def _wake(self, future):
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+    def release(self):
+        with self._lock:
+            if not self._waiters:
+                if self._free >= self.slots:
+                    raise ValueError("ConcurrencyLimiter released too many times")
+                self._free += 1
+                return
+            waiter = self._waiters.popleft()
+        if isinstance(waiter, threading.Event):
+            waiter.set()
+            return
+        loop, future = waiter
+        try:
+            loop.call_soon_threadsafe(self._wake, future)
+        except RuntimeError:
+            # The waiter's event loop is closed
+            self.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class ClientStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.in_flight = 0
+            self.requests = 0
+            self.failures = 0
+            self.retries = 0
+            self.retries_denied = 0
+            self.latency_total_ms = 0.0
+            self.latency_max_ms = 0.0
+
+    def started(self):
+        with self._lock:
+            self.in_flight += 1
+            self.requests += 1
+
+    def finished(self, elapsed_ms: float, ok: bool):
+        with self._lock:
+            self.in_flight -= 1
+            self.latency_total_ms += elapsed_ms
+            self.latency_max_ms = max(self.latency_max_ms, elapsed_ms)
+            if not ok:
+                self.failures += 1
+
+    def retried(self, allowed: bool):
+        with self._lock:
+            if allowed:
+                self.retries += 1
+            else:
+                self.retries_denied += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "requests": self.requests,
+                "failures": self.failures,
+                "retries": self.retries,
+                "retries_denied": self.retries_denied,
+                "latency_avg_ms": round(self.latency_total_ms / self.requests, 2) if self.requests else 0.0,
+                "latency_max_ms": round(self.latency_max_ms, 2)
+            }
+
+
+class OllamaClient:
+    """Shared keep-alive HTTP client for Ollama with sync and async entry points.
+
+    At most `max_concurrency` requests are in flight across both entry points,
+    which share one ConcurrencyLimiter, so callers beyond that queue instead of
+    piling onto the model server; queued coroutines do not hold threads.
+    Connection errors, timeouts and 408/429/5xx responses are retried with
+    full-jitter exponential backoff while the retry budget allows.
+    """
+
+    def __init__(self, base_url: str = None, max_concurrency: int = None, connect_timeout: float = None,
+                 read_timeout: float = None, max_retries: int = None, retry_backoff: float = None,
+                 retry_budget: RetryBudget = None):
+        self._base_url = base_url
+        self.max_concurrency = max_concurrency or settings.OLLAMA_MAX_CONCURRENCY
+        self.connect_timeout = connect_timeout or settings.OLLAMA_CONNECT_TIMEOUT
+        self.read_timeout = read_timeout or settings.OLLAMA_READ_TIMEOUT
+        self.max_retries = settings.OLLAMA_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_backoff = settings.OLLAMA_RETRY_BACKOFF if retry_backoff is None else retry_backoff
+        self.retry_budget = retry_budget or RetryBudget(
+            settings.OLLAMA_RETRY_BUDGET_RATIO,
+            settings.OLLAMA_RETRY_BUDGET_MIN
+        )
+        self.stats = ClientStats()
+        self._slots = ConcurrencyLimiter(self.max_concurrency)
+        self._session = None
+        self._async_client = None
+        self._init_lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        # Read per call so settings.OLLAMA_BASE_URL can be pointed elsewhere at runtime
+        return (self._base_url or settings.OLLAMA_BASE_URL).rstrip("/")
+
+    def _get_session(self) -> requests.Session:
+        with self._init_lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._session = session
+            return self._session
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency
+                )
+            )
+        return self._async_client
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, self.retry_backoff * (2 ** attempt))
+
+    def _should_retry(self, attempt: int) -> bool:
+        if attempt >= self.max_retries:
+            return False
+        allowed = self.retry_budget.try_withdraw()
+        self.stats.retried(allowed)
+        return allowed
+
+    def post(self, path: str, payload: dict) -> dict:
+        session = self._get_session()
+        self.retry_budget.deposit()
+        attempt = 0
+        while True:
+            with self._slots:
+                self.stats.started()
+                started = time.perf_counter()
+                ok = False
+                try:
+                    response = session.post(
+                        f"{self.base_url}{path}",
+                        json=payload,
+                        timeout=(self.connect_timeout, self.read_timeout)
+                    )
+                    ok = response.status_code < 400
+                    error = None if ok else f"Ollama returned {response.status_code}: {response.text[:200]}"
+                    retryable = response.status_code in RETRY_STATUSES
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    error, retryable = f"Ollama request failed: {e}", True
+                finally:
+                    self.stats.finished((time.perf_counter() - started) * 1000, ok)
+            if ok:
+                return response.json()
+            if not retryable or not self._should_retry(attempt):
+                raise OllamaError(error)
+            time.sleep(self._backoff(attempt))
+            attempt += 1
+
+    async def post_async(self, path: str, payload: dict) -> dict:
+        client = self._get_async_client()
+        self.retry_budget.deposit()
+        attempt = 0
+        while True:
+            await self._slots.acquire_async()
+            self.stats.started()
+            started = time.perf_counter()
+            ok = False
+            try:
+                response = await client.post(f"{self.base_url}{path}", json=payload)
+                ok = response.status_code < 400
+                error = None if ok else f"Ollama returned {response.status_code}: {response.text[:200]}"
+                retryable = response.status_code in RETRY_STATUSES
+            except (httpx.TransportError, httpx.TimeoutException) as e:
+                error, retryable = f"Ollama request failed: {e!r}", True
+            finally:
+                self.stats.finished((time.perf_counter() - started) * 1000, ok)
+                self._slots.release()
+            if ok:
+                return response.json()
+            if not retryable or not self._should_retry(attempt):
+                raise OllamaError(error)
+            await asyncio.sleep(self._backoff(attempt))
+            attempt += 1
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats.snapshot(),
+            "max_concurrency": self.max_concurrency,
+            "waiting": self._slots.waiting,
+            "retry_budget_tokens": round(self.retry_budget.tokens, 2)
+        }
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    async def aclose(self):
+        self.close()
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+
+ollama_client = OllamaClient()
@@ -0,0 +1,126 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from app.config.settings import settings
+
+
+class CollectionGeneration:
+    """Write counter for the collection, persisted in SQLite and shared by every process.
+
+    Cached query results are keyed by the generation they were computed at,
+    so a write makes every earlier result unreachable. The API and the
+    offline loaders (bulk_ingest, seed_data) bump the same counter; a process
+    re-reads it at most every `check_seconds`, so another process's writes
+    are seen within that delay rather than after QUERY_CACHE_TTL.
+    """
+
+    def __init__(self, path: str = None, check_seconds: float = None):
+        self.path = path or settings.COLLECTION_GENERATION_PATH
+        self.check_seconds = settings.GENERATION_CHECK_SECONDS if check_seconds is None else check_seconds
+        self._conn = None
+        self._lock = threading.Lock()
+        self._value = None
+        self._checked_at = 0.0
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS generation (id INTEGER PRIMARY KEY, value INTEGER NOT NULL)")
+                conn.execute("INSERT OR IGNORE INTO generation (id, value) VALUES (0, 0)")
+            self._conn = conn
+        return self._conn
+
+    def _observe(self, value: int):
+        """Record the current value; called under the lock."""
+        changed = value != self._value
+        self._value = value
+        self._checked_at = time.monotonic()
+        if changed and query_result_cache is not None:
+            query_result_cache.clear()
+
+    @property
+    def value(self) -> int:
+        with self._lock:
+            if self._value is None or time.monotonic() - self._checked_at >= self.check_seconds:
+                row = self._connect().execute("SELECT value FROM generation WHERE id = 0").fetchone()
+                self._observe(row[0])
+            return self._value
+
+    def bump(self) -> int:
+        with self._lock:
+            conn = self._connect()
+            # The UPDATE takes SQLite's write lock, so the value read back is this bump's own
+            with conn:
+                conn.execute("UPDATE generation SET value = value + 1 WHERE id = 0")
+                value = conn.execute("SELECT value FROM generation WHERE id = 0").fetchone()[0]
+            self._observe(value)
+            return value
+
+
+class QueryResultCache:
+    """LRU + TTL cache of query results, keyed by generation and query parameters."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(generation: int, embedding_key: str, n_results: int, max_distance: float, filters: dict = None):
+        return (generation, embedding_key, n_results, max_distance, json.dumps(filters, sort_keys=True))
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "generation": collection_generation.value,
+                "entries": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+query_result_cache = (
+    QueryResultCache(settings.QUERY_CACHE_SIZE, settings.QUERY_CACHE_TTL)
+    if settings.QUERY_CACHE_SIZE > 0 and settings.QUERY_CACHE_TTL > 0 else None
+)
+collection_generation = CollectionGeneration()
@@ -0,0 +1,265 @@
+import threading
+
+import numpy as np
+
+from app.config.settings import settings
+
+CHROMA = "chroma"
+NUMPY = "numpy"
+LOAD_PAGE_SIZE = 5000
+INITIAL_CAPACITY = 1024
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _matches(metadata: dict, where: dict) -> bool:
+    """Evaluate the Chroma where subset the NumPy backend supports: equality, $eq, $ne, $in, $nin, $and, $or."""
+    for field, condition in where.items():
+        if field == "$and":
+            if not all(_matches(metadata, clause) for clause in condition):
+                return False
+            continue
+        if field == "$or":
+            if not any(_matches(metadata, clause) for clause in condition):
+                return False
+            continue
+        value = metadata.get(field)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for op, operand in condition.items():
+            if op == "$eq":
+                ok = value == operand
+            elif op == "$ne":
+                ok = value != operand
+            elif op == "$in":
+                ok = value in operand
+            elif op == "$nin":
+                ok = value not in operand
+            else:
+                raise ValueError(f"Unsupported where operator for the numpy search backend: {op}")
+            if not ok:
+                return False
+    return True
+
+
+class ChromaSearchBackend:
+    """Approximate search through the collection's own HNSW index."""
+
+    name = CHROMA
+
+    def __init__(self, collection, generation=None):
+        self.collection = collection
+        self.generation = generation
+
+    def query(self, embeddings: list, n_results: int, where: dict = None) -> dict:
+        return self.collection.query(
+            query_embeddings=embeddings,
+            n_results=n_results,
+            where=where or None,
+            include=["documents", "distances"]
+        )
+
+    def upsert(self, ids: list, embeddings: list, documents: list, metadatas: list):
+        pass
+
+    def delete(self, ids: list):
+        pass
+
+    def reload(self):
+        pass
+
+    def bump_generation(self):
+        if self.generation is not None:
+            self.generation.bump()
+
+    def stats(self) -> dict:
+        return {"backend": self.name, "count": self.collection.count()}
+
+
+class NumpySearchBackend:
+    """Exact cosine search over a contiguous float32 matrix mirroring the collection.
+
+    Rows are L2-normalized, so a batch of queries is one matrix product and
+    top-k is argpartition + a sort of k items per query. The mirror is loaded
+    from Chroma on first use and then kept in step by the write paths in
+    vector_service: upserts overwrite or append rows (capacity doubles, so
+    appends are amortized O(1)) and deletes move the last row into the hole.
+
+    Writes made by other processes (bulk_ingest, seed_data) bypass those paths
+    but bump the shared, persisted CollectionGeneration. The mirror remembers
+    the generation it reflects and reloads when a query finds another one.
+    Its own writes advance that generation through bump_generation(), so they
+    do not trigger a reload.
+    """
+
+    name = NUMPY
+
+    def __init__(self, collection, generation=None):
+        self.collection = collection
+        self.generation = generation
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._generation = None
+        self.reloads = 0
+        self._matrix = None
+        self._ids = []
+        self._documents = []
+        self._metadatas = []
+        self._rows = {}
+
+    @property
+    def count(self) -> int:
+        return len(self._ids)
+
+    def _ensure_capacity(self, needed: int, dim: int):
+        if self._matrix is None:
+            self._matrix = np.empty((max(INITIAL_CAPACITY, needed), dim), dtype=np.float32)
+        elif self._matrix.shape[1] != dim:
+            raise ValueError(f"Embedding dimension {dim} does not match the index ({self._matrix.shape[1]})")
+        elif needed > self._matrix.shape[0]:
+            grown = np.empty((max(needed, self._matrix.shape[0] * 2), dim), dtype=np.float32)
+            grown[:self.count] = self._matrix[:self.count]
+            self._matrix = grown
+
+    def _upsert(self, ids: list, embeddings, documents: list, metadatas: list):
+        if not ids:
+            return
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+        new = [chunk_id for chunk_id in dict.fromkeys(ids) if chunk_id not in self._rows]
+        self._ensure_capacity(self.count + len(new), vectors.shape[1])
+        for chunk_id, vector, document, metadata in zip(ids, vectors, documents, metadatas):
+            row = self._rows.get(chunk_id)
+            if row is None:
+                row = self.count
+                self._rows[chunk_id] = row
+                self._ids.append(chunk_id)
+                self._documents.append(document)
+                self._metadatas.append(metadata or {})
+            else:
+                self._documents[row] = document
+                self._metadatas[row] = metadata or {}
+            self._matrix[row] = vector
+
+    def reload(self):
+        """Rebuild the mirror from the collection, a page at a time."""
+        with self._lock:
+            self._matrix = None
+            self._ids, self._documents, self._metadatas, self._rows = [], [], [], {}
+            # Read before the pages, so a write landing mid-load triggers another reload
+            self._generation = None if self.generation is None else self.generation.value
+            offset = 0
+            while True:
+                page = self.collection.get(
+                    limit=LOAD_PAGE_SIZE,
+                    offset=offset,
+                    include=["embeddings", "documents", "metadatas"]
+                )
+                if not page["ids"]:
+                    break
+                self._upsert(page["ids"], page["embeddings"], page["documents"], page["metadatas"])
+                offset += len(page["ids"])
+            self._loaded = True
+            self.reloads += 1
+
+    def _ensure_fresh(self):
+        if not self._loaded or (self.generation is not None and self.generation.value != self._generation):
+            self.reload()
+
+    def bump_generation(self):
+        """Bump the shared generation for a write this mirror has already applied."""
+        if self.generation is None:
+            return
+        with self._lock:
+            value = self.generation.bump()
+            # Any other bump in between was a write the mirror has not seen
+            if self._loaded and value == self._generation + 1:
+                self._generation = value
+
+    def upsert(self, ids: list, embeddings: list, documents: list, metadatas: list):
+        with self._lock:
+            # An unloaded mirror picks these up from Chroma when it first loads
+            if self._loaded:
+                self._upsert(ids, embeddings, documents, metadatas)
+
+    def delete(self, ids: list):
+        with self._lock:
+            if not self._loaded:
+                return
+            for chunk_id in ids:
+                row = self._rows.pop(chunk_id, None)
+                if row is None:
+                    continue
+                last = self.count - 1
+                if row != last:
+                    moved = self._ids[last]
+                    self._matrix[row] = self._matrix[last]
+                    self._ids[row] = moved
+                    self._documents[row] = self._documents[last]
+                    self._metadatas[row] = self._metadatas[last]
+                    self._rows[moved] = row
+                self._ids.pop()
+                self._documents.pop()
+                self._metadatas.pop()
+
+    def query(self, embeddings: list, n_results: int, where: dict = None) -> dict:
+        with self._lock:
+            self._ensure_fresh()
+            result = {"ids": [], "documents": [], "distances": []}
+            if self.count == 0:
+                for _ in embeddings:
+                    result["ids"].append([])
+                    result["documents"].append([])
+                    result["distances"].append([])
+                return result
+
+            candidates = None
+            if where:
+                candidates = np.fromiter(
+                    (i for i, metadata in enumerate(self._metadatas) if _matches(metadata, where)),
+                    dtype=np.int64
+                )
+            matrix = self._matrix[:self.count] if candidates is None else self._matrix[candidates]
+            queries = _normalize(np.asarray(embeddings, dtype=np.float32))
+            scores = queries @ matrix.T
+
+            k = min(n_results, scores.shape[1])
+            for row_scores in scores:
+                if k == 0:
+                    top = np.empty(0, dtype=np.int64)
+                elif k < len(row_scores):
+                    top = np.argpartition(-row_scores, k - 1)[:k]
+                    top = top[np.argsort(-row_scores[top])]
+                else:
+                    top = np.argsort(-row_scores)
+                rows = top if candidates is None else candidates[top]
+                result["ids"].append([self._ids[i] for i in rows])
+                result["documents"].append([self._documents[i] for i in rows])
+                # Same scale as Chroma's cosine space: distance = 1 - cosine similarity
+                result["distances"].append([float(1.0 - row_scores[i]) for i in top])
+            return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            capacity = 0 if self._matrix is None else self._matrix.shape[0]
+            return {
+                "backend": self.name,
+                "loaded": self._loaded,
+                "count": self.count,
+                "capacity": capacity,
+                "matrix_bytes": 0 if self._matrix is None else self._matrix.nbytes,
+                "reloads": self.reloads,
+                "generation": self._generation
+            }
+
+
+def build_search_backend(collection, name: str = None, generation=None):
+    name = name or settings.SEARCH_BACKEND
+    if name == NUMPY:
+        return NumpySearchBackend(collection, generation)
+    if name == CHROMA:
+        return ChromaSearchBackend(collection, generation)
+    raise ValueError(f"Unknown SEARCH_BACKEND: {name}")
@@ -1,39 +1,38 @@
-from app.services.embedding_service import generate_embedding
-from app.db.chroma_client import collection, client
+import json
+import threading
 
-import re
+from app.services.embedding_service import generate_embeddings
+from app.db.chroma_client import collection, client
+from app.services.chunking import chunk_hash, chunk_id_for, chunk_metadata, chunk_text
+from app.services.job_queue import IngestionQueue
+from app.services.embedding_cache import cache_key
+from app.services.query_cache import QueryResultCache, collection_generation, query_result_cache
+from app.services.search_backend import build_search_backend
+from app.config.settings import settings
 
 DEFAULT_N_RESULTS = 5
 DEFAULT_MAX_DISTANCE = 0.25
+# Striped per-doc_id locks: a delete and an ingestion write never interleave
+DOC_LOCK_STRIPES = 64
+_doc_locks = [threading.Lock() for _ in range(DOC_LOCK_STRIPES)]
 
+# Answers similarity queries: Chroma's HNSW index or an exact NumPy mirror (SEARCH_BACKEND)
+search_backend = build_search_backend(collection, generation=collection_generation)
 
 
-def chunk_text(text: str):
-    sections = re.split(r"\n\d+\.\s+", text)
-
-    chunks = []
-    for section in sections:
-        cleaned = section.strip()
-        if cleaned:
-            chunks.append(cleaned)
-
-    return chunks
 
+def _doc_lock(doc_id: str) -> threading.Lock:
+    return _doc_locks[hash(doc_id) % DOC_LOCK_STRIPES]
 
 
 # CREATE
-def add_document(doc_id: str, text: str):
-    chunks = chunk_text(text)
-    
-    embeddings = []
+def _store_chunks(doc_id: str, chunks: list, embeddings: list):
     ids = []
     metadatas = []
     
     for i, chunk in enumerate(chunks):
-        embeddings.append(generate_embedding(chunk))
-        chunk_id = f"{doc_id}_chunk_{i}"
-        ids.append(chunk_id)
-        metadatas.append({"doc_id": doc_id, "chunk_id": chunk_id})
+        ids.append(chunk_id_for(doc_id, i))
+        metadatas.append(chunk_metadata(doc_id, i, chunk))
     
     collection.add(
         documents=chunks,
@@ -41,6 +40,15 @@ def add_document(doc_id: str, text: str):
         ids=ids,
         metadatas=metadatas
     )
+    search_backend.upsert(ids, embeddings, chunks, metadatas)
+    search_backend.bump_generation()
+
+
+def add_document(doc_id: str, text: str):
+    chunks = chunk_text(text)
+    # One /api/embed round trip per EMBED_BATCH_SIZE chunks instead of one per chunk
+    embeddings = generate_embeddings(chunks)
+    _store_chunks(doc_id, chunks, embeddings)
     
     # REMOVE THIS LINE - PersistentClient doesn't need explicit persist()
     # client.persist()
@@ -49,26 +57,10 @@ def add_document(doc_id: str, text: str):
     print(f"✅ Vector count:", collection.count())
 
 # READ
-def query_documents(
-    query: str,
-    n_results: int = DEFAULT_N_RESULTS,
-    max_distance: float = DEFAULT_MAX_DISTANCE
-):
-    query_embedding = generate_embedding(query)
-
-    results = collection.query(
-        query_embeddings=[query_embedding],
-        n_results=n_results,
-        include=["documents", "distances"]
-    )
-
+def _format_hits(ids: list, documents: list, distances: list, n_results: int, max_distance: float) -> list:
     response = []
 
-    documents = results["documents"][0]
-    distances = results["distances"][0]
-    ids = results["ids"][0]
-
-    for doc_id, doc, distance in zip(ids, documents, distances):
+    for doc_id, doc, distance in list(zip(ids, documents, distances))[:n_results]:
         if distance <= max_distance:
             response.append({
                 "chunk_id": doc_id,
@@ -77,29 +69,179 @@ def query_documents(
                 "similarity_score": round(1 - distance, 4)
             })
 
-    return {
+    return response
+
+
+def query_documents_batch(queries: list) -> list:
+    """Answer many queries with batched embedding and multi-vector collection.query.
+
+    Each query is a dict with query, n_results, max_distance and filters.
+    Cached results are served first; the misses are embedded together, then
+    grouped by filter (one where clause per call) and sent to the search
+    backend with the group's largest n_results, trimmed per query afterwards.
+    """
+    answers = [None] * len(queries)
+    keys = [None] * len(queries)
+    generation = collection_generation.value
+
+    # Level 2: results for this query text (i.e. this embedding) at the current generation
+    if query_result_cache is not None:
+        for i, q in enumerate(queries):
+            keys[i] = QueryResultCache.make_key(
+                generation,
+                cache_key(settings.EMBEDDING_MODEL or "", q["query"]),
+                q["n_results"],
+                q["max_distance"],
+                q.get("filters")
+            )
+            answers[i] = query_result_cache.get(keys[i])
+
+    pending = [i for i, answer in enumerate(answers) if answer is None]
+    # Level 1: the embedding cache answers repeated query text without Ollama
+    embeddings = dict(zip(pending, generate_embeddings([queries[i]["query"] for i in pending])))
+
+    groups = {}
+    for i in pending:
+        groups.setdefault(json.dumps(queries[i].get("filters"), sort_keys=True), []).append(i)
+
+    max_batch = client.get_max_batch_size()
+    for members in groups.values():
+        for start in range(0, len(members), max_batch):
+            batch = members[start:start + max_batch]
+            results = search_backend.query(
+                [embeddings[i] for i in batch],
+                max(queries[i]["n_results"] for i in batch),
+                queries[batch[0]].get("filters")
+            )
+            for row, i in enumerate(batch):
+                answers[i] = _format_hits(
+                    results["ids"][row],
+                    results["documents"][row],
+                    results["distances"][row],
+                    queries[i]["n_results"],
+                    queries[i]["max_distance"]
+                )
+                if keys[i] is not None:
+                    query_result_cache.set(keys[i], answers[i])
+
+    return [{"query": q["query"], "results": answer} for q, answer in zip(queries, answers)]
+
+
+def query_documents(
+    query: str,
+    n_results: int = DEFAULT_N_RESULTS,
+    max_distance: float = DEFAULT_MAX_DISTANCE,
+    filters: dict = None
+):
+    return query_documents_batch([{
         "query": query,
-        "results": response
-    }
+        "n_results": n_results,
+        "max_distance": max_distance,
+        "filters": filters
+    }])[0]
 
 # UPDATE
-def update_document(doc_id: str, new_text: str):
-    results = collection.get(where={"doc_id": doc_id})
-    old_ids = results["ids"]
+def update_document(doc_id: str, new_text: str, on_progress=None):
+    """Apply only the chunk-level difference between the stored and the new text.
+
+    Chunks whose content_hash is unchanged at their position are left alone.
+    Changed positions are upserted, reusing the stored embedding when the same
+    text exists elsewhere in the old version (e.g. a section was inserted
+    above it), so only genuinely new text is embedded. Surplus positions are
+    deleted after the upsert, so readers never see the document missing.
+    `on_progress` receives chunks_total / chunks_embedded / chunks_stored counts;
+    the writes happen under the doc_id lock right after a progress report, so
+    a job cancelled by delete_document raises there instead of writing.
+    """
+    report = on_progress or (lambda **counts: None)
+    chunks = chunk_text(new_text)
+    hashes = [chunk_hash(chunk) for chunk in chunks]
+
+    existing = collection.get(where={"doc_id": doc_id}, include=["metadatas"])
+    stored_hash = {
+        chunk_id: (metadata or {}).get("content_hash")
+        for chunk_id, metadata in zip(existing["ids"], existing["metadatas"])
+    }
+    id_by_hash = {content_hash: chunk_id for chunk_id, content_hash in stored_hash.items() if content_hash}
+
+    changed = [
+        i for i, content_hash in enumerate(hashes)
+        if stored_hash.get(chunk_id_for(doc_id, i)) != content_hash
+    ]
+    reusable = {hashes[i]: id_by_hash[hashes[i]] for i in changed if hashes[i] in id_by_hash}
+
+    embeddings = {}
+    if reusable:
+        stored = collection.get(ids=list(set(reusable.values())), include=["embeddings"])
+        by_id = dict(zip(stored["ids"], stored["embeddings"]))
+        embeddings = {
+            content_hash: [float(value) for value in by_id[chunk_id]]
+            for content_hash, chunk_id in reusable.items() if chunk_id in by_id
+        }
+
+    to_embed = [i for i in changed if hashes[i] not in embeddings]
+    already_done = len(chunks) - len(to_embed)
+    report(chunks_total=len(chunks), chunks_embedded=already_done, chunks_stored=len(chunks) - len(changed))
+    fresh = generate_embeddings(
+        [chunks[i] for i in to_embed],
+        on_batch=lambda done: report(chunks_embedded=already_done + done)
+    )
+    for i, embedding in zip(to_embed, fresh):
+        embeddings[hashes[i]] = embedding
+
+    with _doc_lock(doc_id):
+        report(chunks_embedded=len(chunks))
+        if changed:
+            upsert = {
+                "ids": [chunk_id_for(doc_id, i) for i in changed],
+                "documents": [chunks[i] for i in changed],
+                "embeddings": [embeddings[hashes[i]] for i in changed],
+                "metadatas": [chunk_metadata(doc_id, i, chunks[i]) for i in changed]
+            }
+            collection.upsert(**upsert)
+            search_backend.upsert(**upsert)
+
+        report(chunks_stored=len(chunks))
+
+        new_ids = {chunk_id_for(doc_id, i) for i in range(len(chunks))}
+        surplus = [chunk_id for chunk_id in existing["ids"] if chunk_id not in new_ids]
+        if surplus:
+            collection.delete(ids=surplus)
+            search_backend.delete(surplus)
+        if changed or surplus:
+            search_backend.bump_generation()
+
+    return {
+        "unchanged": len(chunks) - len(changed),
+        "upserted": len(changed),
+        "reused_embeddings": len(changed) - len(to_embed),
+        "embedded": len(to_embed),
+        "deleted": len(surplus)
+    }
+
 
-    collection.delete(ids=old_ids)
-    add_document(doc_id, new_text)
+# Background ingestion: POST/PUT /vectors enqueue an incremental update per doc_id
+ingestion_queue = IngestionQueue(update_document)
 
 
 # DELETE
 def delete_document(doc_id: str):
-    results = collection.get(where={"doc_id": doc_id})
-    collection.delete(ids=results["ids"])
+    with _doc_lock(doc_id):
+        # Queued jobs never start; a running one stays running until it aborts at its next write
+        ingestion_queue.cancel(doc_id)
+        results = collection.get(where={"doc_id": doc_id})
+        if results["ids"]:
+            collection.delete(ids=results["ids"])
+            search_backend.delete(results["ids"])
+            search_backend.bump_generation()
 
 
 def get_all_documents(limit: int = 10):
-    return collection.get(
+    results = collection.get(
         limit=limit,
         include=["documents", "embeddings", "metadatas"]
     )
+    # Chroma returns embeddings as numpy arrays, which are not JSON serializable
+    results["embeddings"] = [list(map(float, embedding)) for embedding in results["embeddings"]]
+    return results
 
@@ -1,15 +1,53 @@
 import pytest
 import sys
 import os
+import threading
+import time
+from uuid import uuid4
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from fastapi.testclient import TestClient
 from main import app  
+from app.config.settings import settings
+from app.scripts.fake_ollama import FakeOllamaServer
+from app.services.embedding_service import generate_embedding, generate_embeddings
+from app.services.ollama_client import OllamaClient, OllamaError, RetryBudget
+from app.services.embedding_cache import EmbeddingCache
+from app.services.job_queue import IngestionQueue
+
+# Fall back to the local fake Ollama when no real server is configured
+if not settings.OLLAMA_BASE_URL:
+    settings.OLLAMA_BASE_URL = FakeOllamaServer().start().url
 
 # Create test client
 client = TestClient(app)
 
+query_cache_enabled = pytest.mark.skipif(
+    settings.QUERY_CACHE_SIZE <= 0 or settings.QUERY_CACHE_TTL <= 0, reason="query result cache disabled"
+)
+
+
+@pytest.fixture
+def fake_ollama(monkeypatch):
+    # A private fake Ollama per test, so request counters start at zero;
+    # pytest runs the teardown even when the test fails
+    server = FakeOllamaServer().start()
+    monkeypatch.setattr(settings, "OLLAMA_BASE_URL", server.url)
+    yield server
+    server.stop()
+
+
+def wait_for_job(job_id, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/vectors/jobs/{job_id}").json()
+        if job["status"] in ("done", "failed", "cancelled"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
 def test_health_check():
     response = client.get("/")
     assert response.status_code == 200
@@ -20,14 +58,17 @@ def test_create_vector():
         "id": "test_1",
         "text": "This is a test document"
     })
-    assert response.status_code == 200
-    assert response.json()["message"] == "Document added successfully"
+    assert response.status_code == 202
+    job = wait_for_job(response.json()["job_id"])
+    assert job["status"] == "done"
+    assert job["chunks_total"] == job["chunks_embedded"] == job["chunks_stored"] == 1
 
 def test_query_vectors():
-    client.post("/vectors", json={
+    response = client.post("/vectors", json={
         "id": "test_query",
         "text": "Safety training is mandatory for all employees"
     })
+    wait_for_job(response.json()["job_id"])
     
     response = client.post("/vectors/query", json={
         "query": "safety training"
@@ -35,22 +76,547 @@ def test_query_vectors():
     assert response.status_code == 200
     assert "results" in response.json()
 
+@query_cache_enabled
+def test_query_cache_hits_and_invalidates_on_write(fake_ollama):
+    from app.services.query_cache import query_result_cache
+
+    tag = uuid4().hex
+    doc_id = f"test_cache_{tag[:8]}"
+    response = client.post("/vectors", json={"id": doc_id, "text": f"Remote work allowance {tag}"})
+    wait_for_job(response.json()["job_id"])
+
+    body = {"query": f"Remote work allowance {tag}", "max_distance": 2, "filters": {"doc_id": doc_id}}
+    first = client.post("/vectors/query", json=body).json()
+    hits_before = query_result_cache.hits
+    second = client.post("/vectors/query", json=body).json()
+    assert second == first
+    assert query_result_cache.hits == hits_before + 1
+    assert [r["chunk_id"] for r in first["results"]] == [f"{doc_id}_chunk_0"]
+
+    # a write bumps the generation, so the next query sees the new content
+    response = client.put(f"/vectors/{doc_id}", json={"id": doc_id, "text": f"Remote work stipend {tag}"})
+    wait_for_job(response.json()["job_id"])
+    third = client.post("/vectors/query", json=body).json()
+    assert third["results"][0]["content"] == f"Remote work stipend {tag}"
+
+
+def test_collection_generation_is_shared_across_processes(tmp_path):
+    from app.services.query_cache import CollectionGeneration
+
+    path = str(tmp_path / "generation.sqlite3")
+    api, loader = CollectionGeneration(path, check_seconds=0), CollectionGeneration(path, check_seconds=0)
+    lagging = CollectionGeneration(path, check_seconds=60)
+    assert api.value == lagging.value == 0
+
+    assert loader.bump() == 1
+    assert api.value == 1
+    # re-read at most every check_seconds
+    assert lagging.value == 0
+    assert api.bump() == 2
+
+
+@query_cache_enabled
+def test_query_cache_sees_writes_from_other_processes(fake_ollama, monkeypatch):
+    from app.services.query_cache import CollectionGeneration, collection_generation, query_result_cache
+
+    monkeypatch.setattr(collection_generation, "check_seconds", 0)
+    tag = uuid4().hex
+    body = {"query": f"Parking permits {tag}", "max_distance": 2}
+    client.post("/vectors/query", json=body)
+    hits_before = query_result_cache.hits
+    client.post("/vectors/query", json=body)
+    assert query_result_cache.hits == hits_before + 1
+
+    # what bulk_ingest does after each window, from its own process
+    CollectionGeneration().bump()
+    client.post("/vectors/query", json=body)
+    assert query_result_cache.hits == hits_before + 1
+
+
+def test_batch_query_honors_per_query_options(fake_ollama):
+    tag = uuid4().hex
+    doc_id = f"test_batch_{tag[:8]}"
+    text = f"Handbook {tag}\n" + "\n".join(f"{i}. Travel rule {i} {tag}" for i in range(1, 5))
+    wait_for_job(client.post("/vectors", json={"id": doc_id, "text": text}).json()["job_id"])
+    requests_before = fake_ollama.requests
+
+    response = client.post("/vectors/query/batch", json={"queries": [
+        {"query": f"Travel rule 1 {tag}", "n_results": 3, "max_distance": 2, "filters": {"doc_id": doc_id}},
+        {"query": f"Travel rule 2 {tag}", "n_results": 1, "max_distance": 2, "filters": {"doc_id": doc_id}},
+        {"query": f"Travel rule 3 {tag}", "n_results": 5, "max_distance": 0.0001, "filters": {"doc_id": doc_id}},
+        {"query": f"Unrelated {tag}", "n_results": 2, "max_distance": 2}
+    ]})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["query"] for r in results][:2] == [f"Travel rule 1 {tag}", f"Travel rule 2 {tag}"]
+    assert len(results[0]["results"]) == 3
+    assert results[0]["results"][0]["chunk_id"] == f"{doc_id}_chunk_1"
+    assert [r["chunk_id"] for r in results[1]["results"]] == [f"{doc_id}_chunk_2"]
+    assert [r["chunk_id"] for r in results[2]["results"]] == [f"{doc_id}_chunk_3"]
+    assert len(results[3]["results"]) <= 2
+    # all four queries were embedded in one request
+    assert fake_ollama.requests - requests_before == 1
+
+    single = client.post("/vectors/query", json={
+        "query": f"Travel rule 2 {tag}", "n_results": 1, "max_distance": 2, "filters": {"doc_id": doc_id}
+    }).json()
+    assert single == results[1]
+
+
+def test_query_rejects_bad_filters():
+    response = client.post("/vectors/query", json={"query": "leave", "filters": {"doc_id": {"$bogus": 1}}})
+    assert response.status_code == 400
+
+
 def test_get_all_vectors():
     response = client.get("/vectors")
     assert response.status_code == 200
     assert "ids" in response.json()
 
 def test_delete_vector():
+    from app.db.chroma_client import collection
+
     # First add
-    client.post("/vectors", json={
+    response = client.post("/vectors", json={
         "id": "test_delete",
         "text": "Document to delete"
     })
-    
+    wait_for_job(response.json()["job_id"])
 
     response = client.delete("/vectors/test_delete")
     assert response.status_code == 200
     assert response.json()["message"] == "Document deleted"
+    assert collection.get(where={"doc_id": "test_delete"})["ids"] == []
+
+
+def test_delete_cancels_running_ingestion(fake_ollama):
+    from app.db.chroma_client import collection
+
+    # slow embedding keeps the job running while the document is deleted
+    fake_ollama.request_latency_ms = 300
+    tag = uuid4().hex
+    doc_id = f"test_delete_running_{tag[:8]}"
+    text = f"Handbook {tag}\n" + "\n".join(f"{i}. Expense rule {i} {tag}" for i in range(1, 3))
+    job_id = client.post("/vectors", json={"id": doc_id, "text": text}).json()["job_id"]
+    deadline = time.monotonic() + 5
+    while client.get(f"/vectors/jobs/{job_id}").json()["status"] != "running":
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    assert client.delete(f"/vectors/{doc_id}").status_code == 200
+    job = wait_for_job(job_id)
+
+    assert job["status"] == "cancelled"
+    assert collection.get(where={"doc_id": doc_id})["ids"] == []
+
+
+def test_generate_embeddings_batches(fake_ollama):
+    # unique texts, so the persistent embedding cache cannot answer them
+    texts = [f"Policy section {i} {uuid4().hex}" for i in range(5)]
+
+    embeddings = generate_embeddings(texts, batch_size=2)
+
+    assert len(embeddings) == 5
+    assert fake_ollama.requests == 3
+    assert fake_ollama.inputs == 5
+
+
+def test_single_and_batched_embeddings_match():
+    texts = ["Safety training is mandatory", "Leave must be approved"]
+    assert generate_embeddings(texts) == [generate_embedding(text) for text in texts]
+
+
+def test_ollama_client_retries_then_succeeds(fake_ollama):
+    fake_ollama.fail_requests = 2
+    ollama = OllamaClient(base_url=fake_ollama.url, max_retries=3, retry_backoff=0.001)
+
+    data = ollama.post("/api/embed", {"input": ["retry me"]})
+
+    assert len(data["embeddings"]) == 1
+    assert ollama.snapshot()["retries"] == 2
+    assert ollama.snapshot()["failures"] == 2
+
+
+def test_ollama_client_retry_budget_exhausted(fake_ollama):
+    fake_ollama.fail_requests = 10
+    ollama = OllamaClient(base_url=fake_ollama.url, max_retries=5, retry_backoff=0.001,
+                          retry_budget=RetryBudget(ratio=0.0, min_retries=1))
+
+    with pytest.raises(OllamaError):
+        ollama.post("/api/embed", {"input": ["no budget"]})
+
+    stats = ollama.snapshot()
+    assert stats["retries"] == 1
+    assert stats["retries_denied"] == 1
+
+
+def test_ollama_client_limits_concurrency(fake_ollama):
+    from concurrent.futures import ThreadPoolExecutor
+
+    fake_ollama.request_latency_ms = 20
+    ollama = OllamaClient(base_url=fake_ollama.url, max_concurrency=2)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda i: ollama.post("/api/embed", {"input": [str(i)]}), range(8)))
+
+    assert fake_ollama.requests == 8
+    assert fake_ollama.max_in_flight <= 2
+    assert ollama.snapshot()["in_flight"] == 0
+
+
+def test_ollama_client_async(fake_ollama):
+    import asyncio
+
+    ollama = OllamaClient(base_url=fake_ollama.url, max_concurrency=2)
+
+    async def embed_all():
+        try:
+            return await asyncio.gather(*[
+                ollama.post_async("/api/embed", {"input": [str(i)]}) for i in range(4)
+            ])
+        finally:
+            await ollama.aclose()
+
+    results = asyncio.run(embed_all())
+
+    assert len(results) == 4
+    assert fake_ollama.max_in_flight <= 2
+
+
+def test_ollama_client_caps_sync_and_async_together(fake_ollama):
+    import asyncio
+
+    fake_ollama.request_latency_ms = 20
+    ollama = OllamaClient(base_url=fake_ollama.url, max_concurrency=2)
+
+    async def embed_all():
+        try:
+            return await asyncio.gather(
+                *[ollama.post_async("/api/embed", {"input": [f"a{i}"]}) for i in range(4)],
+                *[asyncio.to_thread(ollama.post, "/api/embed", {"input": [f"s{i}"]}) for i in range(4)]
+            )
+        finally:
+            await ollama.aclose()
+
+    assert len(asyncio.run(embed_all())) == 8
+    assert fake_ollama.max_in_flight <= 2
+    assert ollama.snapshot()["in_flight"] == 0
+
+
+def test_concurrency_limiter_hands_slots_to_coroutines_without_threads():
+    import asyncio
+    from app.services.ollama_client import ConcurrencyLimiter
+
+    limiter = ConcurrencyLimiter(1)
+    limiter.acquire()
+    threads_before = threading.active_count()
+    order = []
+
+    async def waiter(name):
+        await limiter.acquire_async()
+        order.append(name)
+        limiter.release()
+
+    async def run():
+        tasks = [asyncio.create_task(waiter(i)) for i in range(50)]
+        await asyncio.sleep(0.05)
+        assert limiter.waiting == 50
+        assert threading.active_count() == threads_before
+        tasks[1].cancel()
+        await asyncio.sleep(0)
+        # released from another thread, as the sync entry point does
+        threading.Thread(target=limiter.release).start()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run(run())
+
+    assert order == [0, *range(2, 50)]
+    assert limiter.waiting == 0
+    limiter.acquire()  # the slot came back exactly once
+    limiter.release()
+
+
+def test_embedding_cache_tiers_and_model_eviction(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_MODEL", "model-a")
+    path = str(tmp_path / "cache.sqlite3")
+    cache = EmbeddingCache(path=path, max_memory_items=10)
+    cache.put_many(["Leave  policy\n"], [[0.5, 0.25]])
+
+    # whitespace-normalized text hits the memory tier
+    assert cache.get_many(["Leave policy", "unknown"]) == [[0.5, 0.25], None]
+    cache.close()
+
+    reopened = EmbeddingCache(path=path, max_memory_items=10)
+    assert reopened.get_many(["Leave policy"]) == [[0.5, 0.25]]
+    stats = reopened.stats()
+    assert stats["disk_hits"] == 1
+    assert stats["hit_rate"] == 1.0
+
+    monkeypatch.setattr(settings, "EMBEDDING_MODEL", "model-b")
+    assert reopened.get_many(["Leave policy"]) == [None]
+    assert reopened.stats()["disk_entries"] == 0
+    reopened.close()
+
+
+def test_embedding_cache_prunes_disk_rows(tmp_path, monkeypatch):
+    from app.services import embedding_cache as cache_module
+
+    clock = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: clock[0])
+    cache = EmbeddingCache(path=str(tmp_path / "cache.sqlite3"), max_memory_items=1,
+                           max_disk_rows=10, max_age=3600)
+    for i in range(12):
+        clock[0] += 1
+        cache.put_many([f"text {i}"], [[float(i)]])
+
+    # the 11th row went over the cap: the two oldest were pruned, down to 90% of it
+    assert cache.stats()["disk_entries"] == 10
+    assert cache.get_many(["text 0", "text 1", "text 2", "text 11"]) == [None, None, [2.0], [11.0]]
+
+    clock[0] += 7200
+    cache.put_many(["fresh"], [[1.0]])
+    assert cache.stats()["disk_entries"] == 1
+    assert cache.stats()["pruned"] == 12
+    cache.close()
+
+
+@pytest.mark.skipif(not settings.EMBED_CACHE_ENABLED, reason="embedding cache disabled")
+def test_generate_embeddings_uses_cache(fake_ollama):
+    texts = [f"Cached section {uuid4().hex}" for _ in range(3)]
+
+    first = generate_embeddings(texts)
+    second = generate_embeddings(texts + texts[:1])
+
+    assert fake_ollama.inputs == 3
+    assert second == first + first[:1]
+
+
+def test_update_vector_only_embeds_changed_chunks(fake_ollama):
+    doc_id = f"test_update_{uuid4().hex[:8]}"
+    tag = uuid4().hex
+
+    def policy(sections):
+        return f"Policy {tag}\n" + "\n".join(f"{i}. {s}" for i, s in enumerate(sections, 1))
+
+    sections = [f"Section {name} {tag}" for name in ("intro", "leave", "security")]
+    response = client.post("/vectors", json={"id": doc_id, "text": policy(sections)})
+    wait_for_job(response.json()["job_id"])
+    inputs_after_create = fake_ollama.inputs
+
+    # insert a new first section and drop the last two: only the new text is embedded
+    new_sections = [f"Section preface {tag}", sections[0]]
+    response = client.put(f"/vectors/{doc_id}", json={"id": doc_id, "text": policy(new_sections)})
+    assert response.status_code == 202
+    job = wait_for_job(response.json()["job_id"])
+
+    assert job["result"] == {
+        "unchanged": 1, "upserted": 2, "reused_embeddings": 1, "embedded": 1, "deleted": 1
+    }
+    assert fake_ollama.inputs - inputs_after_create == 1
+
+    from app.db.chroma_client import collection
+    stored = collection.get(where={"doc_id": doc_id})
+    assert sorted(zip(stored["ids"], stored["documents"])) == [
+        (f"{doc_id}_chunk_{i}", chunk) for i, chunk in enumerate([f"Policy {tag}"] + new_sections)
+    ]
+
+    response = client.put(f"/vectors/{doc_id}", json={"id": doc_id, "text": policy(new_sections)})
+    assert wait_for_job(response.json()["job_id"])["result"]["unchanged"] == 3
+
+
+def test_ingestion_queue_collapses_queued_jobs_per_doc(tmp_path):
+    started, release = threading.Event(), threading.Event()
+    seen = []
+
+    def handler(doc_id, text, on_progress):
+        seen.append((doc_id, text))
+        started.set()
+        release.wait(5)
+        return {"text": text}
+
+    queue = IngestionQueue(handler, path=str(tmp_path / "jobs.sqlite3"), workers=2)
+    first = queue.submit("policy", "v1")
+    assert started.wait(5)
+
+    # v1 is running: v2 queues behind it, v3 collapses into the queued v2 job
+    second = queue.submit("policy", "v2")
+    third = queue.submit("policy", "v3")
+    assert third["job_id"] == second["job_id"] != first["job_id"]
+    assert third["deduplicated"] is True
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while queue.get(second["job_id"])["status"] != "done" and time.monotonic() < deadline:
+        time.sleep(0.02)
+    queue.stop()
+
+    assert seen == [("policy", "v1"), ("policy", "v3")]
+
+
+def test_ingestion_queue_cancel_keeps_doc_blocked_until_worker_stops(tmp_path):
+    started, release = threading.Event(), threading.Event()
+    seen = []
+
+    def handler(doc_id, text, report):
+        seen.append(text)
+        started.set()
+        release.wait(5)
+        report(chunks_stored=1)
+        return {"text": text}
+
+    queue = IngestionQueue(handler, path=str(tmp_path / "jobs.sqlite3"), workers=2)
+    first = queue.submit("policy", "v1")
+    assert started.wait(5)
+    assert queue.cancel("policy") == 1
+    job = queue.get(first["job_id"])
+    assert job["status"] == "running" and job["cancel_requested"] is True
+
+    # v1 still runs until it reports, so v2 must wait for it
+    second = queue.submit("policy", "v2")
+    time.sleep(0.1)
+    assert seen == ["v1"]
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while queue.get(second["job_id"])["status"] != "done" and time.monotonic() < deadline:
+        time.sleep(0.02)
+    queue.stop()
+
+    assert queue.get(first["job_id"])["status"] == "cancelled"
+    assert seen == ["v1", "v2"]
+
+
+def test_ingestion_queue_recovery_does_not_duplicate_queued_jobs(tmp_path):
+    import sqlite3
+
+    seen = []
+    path = str(tmp_path / "jobs.sqlite3")
+    queue = IngestionQueue(lambda doc_id, text, report: seen.append((doc_id, text)), path=path, workers=1)
+    queue.stats()  # creates the schema
+    # the state a crash leaves behind: "policy" has a newer queued job behind its running one
+    with sqlite3.connect(path) as conn:
+        conn.executemany(
+            "INSERT INTO jobs (id, doc_id, text, status, created_at) VALUES (?, ?, ?, ?, ?)",
+            [("a", "policy", "v1", "running", 1), ("b", "policy", "v2", "queued", 2), ("c", "other", "x", "running", 3)]
+        )
+
+    queue.start()
+    deadline = time.monotonic() + 5
+    while {queue.get(job_id)["status"] for job_id in "bc"} != {"done"} and time.monotonic() < deadline:
+        time.sleep(0.02)
+    queue.stop()
+
+    assert queue.get("a")["status"] == "cancelled"
+    assert sorted(seen) == [("other", "x"), ("policy", "v2")]
+
+
+def test_bulk_ingest_resumes_from_checkpoint(tmp_path):
+    import json
+    from app.db.chroma_client import collection
+    from app.scripts.bulk_ingest import bulk_ingest
+
+    tag = uuid4().hex[:8]
+    corpus = tmp_path / "corpus.jsonl"
+    corpus.write_text("\n".join(
+        json.dumps({"id": f"bulk_{tag}_{i}", "text": f"Policy {i}\n1. Rule {i} {tag}\n2. Scope {i} {tag}"})
+        for i in range(5)
+    ))
+    checkpoint = str(tmp_path / "corpus.checkpoint.json")
+
+    report = bulk_ingest(str(corpus), checkpoint_path=checkpoint, window=2, chunk_workers=1)
+    assert report["docs"] == 5
+    assert report["chunks"] == 15
+    assert report["checkpoint_docs_done"] == 5
+    assert len(collection.get(where={"doc_id": f"bulk_{tag}_4"})["ids"]) == 3
+
+    # a finished run has nothing left to do
+    report = bulk_ingest(str(corpus), checkpoint_path=checkpoint, window=2, chunk_workers=1)
+    assert report["skipped_docs"] == 5
+    assert report["docs"] == 0
+
+    # re-ingesting a document that shrank drops its surplus chunks
+    corpus.write_text(json.dumps({"id": f"bulk_{tag}_4", "text": f"Policy 4 {tag}"}))
+    bulk_ingest(str(corpus), checkpoint_path=None, window=2, chunk_workers=1)
+    assert collection.get(where={"doc_id": f"bulk_{tag}_4"})["ids"] == [f"bulk_{tag}_4_chunk_0"]
+
+
+def test_numpy_backend_matches_brute_force_after_incremental_writes(tmp_path):
+    import chromadb
+    import numpy as np
+    from app.services.query_cache import CollectionGeneration
+    from app.services.search_backend import NumpySearchBackend
+
+    rng = np.random.default_rng(7)
+    scratch = chromadb.EphemeralClient().get_or_create_collection(
+        f"numpy_{uuid4().hex[:8]}", metadata={"hnsw:space": "cosine"}
+    )
+    ids = [f"c{i}" for i in range(60)]
+    vectors = rng.normal(size=(60, 16)).astype(np.float32)
+    metadatas = [{"doc_id": f"d{i % 3}"} for i in range(60)]
+    scratch.add(ids=ids[:40], embeddings=vectors[:40].tolist(), documents=ids[:40], metadatas=metadatas[:40])
+
+    backend = NumpySearchBackend(scratch)
+    backend.query(vectors[:1].tolist(), 1)  # loads the first 40 rows from Chroma
+    backend.upsert(ids[40:], vectors[40:].tolist(), ids[40:], metadatas[40:])
+    backend.delete(["c0", "c5", "c59"])
+    vectors[7] = rng.normal(size=16)
+    backend.upsert(["c7"], [vectors[7].tolist()], ["c7"], [metadatas[7]])
+
+    live = [i for i in range(60) if ids[i] not in ("c0", "c5", "c59")]
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = rng.normal(size=(4, 16)).astype(np.float32)
+    result = backend.query(queries.tolist(), 5)
+    for q, got in zip(queries, result["ids"]):
+        scores = unit[live] @ (q / np.linalg.norm(q))
+        assert got == [ids[live[i]] for i in np.argsort(-scores)[:5]]
+
+    filtered = backend.query(queries.tolist(), 3, {"doc_id": "d1"})
+    assert all(chunk_id.startswith("c") and int(chunk_id[1:]) % 3 == 1
+               for row in filtered["ids"] for chunk_id in row)
+    assert backend.stats()["count"] == 57
+
+    # other processes bump the persisted generation, and the mirror reloads on a new one
+    generation_path = str(tmp_path / "generation.sqlite3")
+    mirror = NumpySearchBackend(scratch, CollectionGeneration(generation_path, check_seconds=0))
+    writer = CollectionGeneration(generation_path, check_seconds=0)
+    mirror.query(queries[:1].tolist(), 1)  # loads the mirror
+    scratch.add(ids=["x0"], embeddings=[queries[0].tolist()], documents=["x0"], metadatas=[{"doc_id": "x"}])
+    writer.bump()
+    assert mirror.query(queries[:1].tolist(), 1)["ids"] == [["x0"]]
+    # a rewrite that keeps the row count is seen as well
+    scratch.upsert(ids=["x0"], embeddings=[(-queries[0]).tolist()], documents=["x0"], metadatas=[{"doc_id": "x"}])
+    writer.bump()
+    assert mirror.query(queries[:1].tolist(), 1)["ids"] != [["x0"]]
+    assert mirror.stats()["reloads"] == 3
+
+    # the mirror's own writes advance its generation without a reload
+    mirror.upsert(["x1"], [queries[1].tolist()], ["x1"], [{"doc_id": "x"}])
+    mirror.bump_generation()
+    assert mirror.query(queries[1:2].tolist(), 1)["ids"] == [["x1"]]
+    assert mirror.stats()["reloads"] == 3
+
+    response = client.post("/vectors/index/reload")
+    assert response.status_code == 200
+
+    response = client.get("/vectors/index/stats")
+    assert response.status_code == 200
+    assert response.json()["backend"] in ("chroma", "numpy")
+
+
+def test_get_missing_job():
+    assert client.get("/vectors/jobs/does-not-exist").status_code == 404
+
+
+def test_embedding_stats_endpoint():
+    response = client.get("/embeddings/stats")
+    assert response.status_code == 200
+    assert "in_flight" in response.json()
+
+    response = client.get("/embeddings/cache/stats")
+    assert response.status_code == 200
+    assert response.json()["enabled"] is settings.EMBED_CACHE_ENABLED
+    assert ("hit_rate" in response.json()) is settings.EMBED_CACHE_ENABLED
 
 
 if __name__ == "__main__":